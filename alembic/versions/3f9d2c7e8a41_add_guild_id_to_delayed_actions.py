@@ -0,0 +1,39 @@
+"""Add guild id to delayed actions
+
+Revision ID: 3f9d2c7e8a41
+Revises: b7fae3499a2b
+Create Date: 2019-05-02 21:14:37.482190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import botus_receptus
+
+# revision identifiers, used by Alembic.
+revision = '3f9d2c7e8a41'
+down_revision = 'b7fae3499a2b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'delayed_actions',
+        sa.Column('guild_id', botus_receptus.gino.base.Snowflake(), nullable=True),
+    )
+    # every action so far was scheduled with the guild id as its first argument
+    op.execute(
+        "UPDATE delayed_actions SET guild_id = delayed_actions.profile #>> '{args,0}'"
+    )
+    op.alter_column('delayed_actions', 'guild_id', nullable=False)
+    op.create_index(
+        op.f('ix_delayed_actions_guild_id'),
+        'delayed_actions',
+        ['guild_id'],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_delayed_actions_guild_id'), table_name='delayed_actions')
+    op.drop_column('delayed_actions', 'guild_id')
@@ -0,0 +1,57 @@
+"""Notify on delayed action changes
+
+Revision ID: 5a1e6b0d93c2
+Revises: 3f9d2c7e8a41
+Create Date: 2019-05-04 15:02:11.903417
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5a1e6b0d93c2'
+down_revision = '3f9d2c7e8a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        """
+        CREATE FUNCTION notify_delayed_action() RETURNS trigger AS $$
+        DECLARE
+            action delayed_actions;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                action := OLD;
+            ELSE
+                action := NEW;
+            END IF;
+
+            PERFORM pg_notify(
+                'delayed_actions',
+                json_build_object(
+                    'op', TG_OP,
+                    'id', action.id,
+                    'guild_id', action.guild_id,
+                    'expires', action.expires
+                )::text
+            );
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER delayed_actions_notify
+        AFTER INSERT OR UPDATE OR DELETE ON delayed_actions
+        FOR EACH ROW EXECUTE PROCEDURE notify_delayed_action()
+        """
+    )
+
+
+def downgrade():
+    op.execute('DROP TRIGGER delayed_actions_notify ON delayed_actions')
+    op.execute('DROP FUNCTION notify_delayed_action()')
@@ -0,0 +1,59 @@
+"""Notify cache invalidation
+
+Revision ID: 8c4b7e1f2d90
+Revises: 5a1e6b0d93c2
+Create Date: 2019-05-06 19:40:52.117284
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4b7e1f2d90'
+down_revision = '5a1e6b0d93c2'
+branch_labels = None
+depends_on = None
+
+tables = ('guild_prefs', 'self_roles', 'linked_roles')
+
+
+def upgrade():
+    # notifications with the same payload in one transaction are delivered once,
+    # so statements touching many rows of a guild only invalidate it once
+    op.execute(
+        """
+        CREATE FUNCTION notify_cache_invalidation() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM pg_notify(
+                    'cache_invalidation', TG_TABLE_NAME || ':' || OLD.guild_id
+                );
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM pg_notify(
+                    'cache_invalidation', TG_TABLE_NAME || ':' || NEW.guild_id
+                );
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+    for table in tables:
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_cache_invalidation
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE PROCEDURE notify_cache_invalidation()
+            """
+        )
+
+
+def downgrade():
+    for table in tables:
+        op.execute(f'DROP TRIGGER {table}_cache_invalidation ON {table}')
+
+    op.execute('DROP FUNCTION notify_cache_invalidation()')
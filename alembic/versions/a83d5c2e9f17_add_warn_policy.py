@@ -0,0 +1,33 @@
+"""Add warn policy to guild prefs
+
+Revision ID: a83d5c2e9f17
+Revises: f1c7d8e3a56b
+Create Date: 2019-05-21 21:03:52.947120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a83d5c2e9f17'
+down_revision = 'f1c7d8e3a56b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'guild_prefs',
+        sa.Column(
+            'warn_policy',
+            postgresql.JSONB(astext_type=sa.Text()),
+            server_default='{}',
+            nullable=False,
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column('guild_prefs', 'warn_policy')
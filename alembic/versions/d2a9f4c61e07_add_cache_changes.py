@@ -0,0 +1,93 @@
+"""Add cache changes
+
+Revision ID: d2a9f4c61e07
+Revises: 8c4b7e1f2d90
+Create Date: 2019-05-08 22:31:05.661420
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import botus_receptus
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a9f4c61e07'
+down_revision = '8c4b7e1f2d90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'cache_changes',
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('guild_id', botus_receptus.gino.base.Snowflake(), nullable=False),
+        sa.Column(
+            'changed_at',
+            sa.DateTime(timezone=True),
+            server_default=sa.text('clock_timestamp()'),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint('table_name', 'guild_id'),
+    )
+    op.create_index(
+        op.f('ix_cache_changes_changed_at'),
+        'cache_changes',
+        ['changed_at'],
+        unique=False,
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_cache_invalidation() RETURNS trigger AS $$
+        DECLARE
+            guild_ids text[];
+            guild text;
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                guild_ids := guild_ids || OLD.guild_id::text;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                guild_ids := guild_ids || NEW.guild_id::text;
+            END IF;
+
+            FOREACH guild IN ARRAY guild_ids LOOP
+                INSERT INTO cache_changes (table_name, guild_id)
+                VALUES (TG_TABLE_NAME, guild)
+                ON CONFLICT (table_name, guild_id)
+                DO UPDATE SET changed_at = clock_timestamp();
+
+                PERFORM pg_notify('cache_invalidation', TG_TABLE_NAME || ':' || guild);
+            END LOOP;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+
+def downgrade():
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_cache_invalidation() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM pg_notify(
+                    'cache_invalidation', TG_TABLE_NAME || ':' || OLD.guild_id
+                );
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM pg_notify(
+                    'cache_invalidation', TG_TABLE_NAME || ':' || NEW.guild_id
+                );
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.drop_index(op.f('ix_cache_changes_changed_at'), table_name='cache_changes')
+    op.drop_table('cache_changes')
@@ -0,0 +1,26 @@
+"""Add overwrite fingerprint to guild prefs
+
+Revision ID: e6b3a9d1c254
+Revises: d2a9f4c61e07
+Create Date: 2019-05-14 20:48:37.215904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b3a9d1c254'
+down_revision = 'd2a9f4c61e07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'guild_prefs', sa.Column('overwrite_fingerprint', sa.String(), nullable=True)
+    )
+
+
+def downgrade():
+    op.drop_column('guild_prefs', 'overwrite_fingerprint')
@@ -0,0 +1,31 @@
+"""Add locked channels
+
+Revision ID: f1c7d8e3a56b
+Revises: e6b3a9d1c254
+Create Date: 2019-05-16 19:12:44.380517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import botus_receptus
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c7d8e3a56b'
+down_revision = 'e6b3a9d1c254'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'locked_channels',
+        sa.Column('guild_id', botus_receptus.gino.base.Snowflake(), nullable=False),
+        sa.Column('channel_id', botus_receptus.gino.base.Snowflake(), nullable=False),
+        sa.Column('send_messages', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('guild_id', 'channel_id'),
+    )
+
+
+def downgrade():
+    op.drop_table('locked_channels')
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List
+
+import argparse
+import asyncio
+import os
+import sys
+import uvloop
+
+from .environment import Environment
+from .harness import Result, compare, format_results, load_baseline, save_baseline
+from .scenarios import build
+
+DEFAULT_DSN = 'postgresql://localhost/bothanasius_bench'
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark Bothanasius against a local Postgres database',
+    )
+    parser.add_argument(
+        '--dsn',
+        default=os.environ.get('BOTHANASIUS_BENCH_DB', DEFAULT_DSN),
+        help='database to run against; its tables are truncated',
+    )
+    parser.add_argument('--iterations', type=int, help='override iteration counts')
+    parser.add_argument(
+        '--only', action='append', default=[], help='run benchmarks containing this'
+    )
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        '--save-baseline',
+        action='store_true',
+        help='store this run as the new baseline',
+    )
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.2,
+        help='allowed relative slowdown before a run fails (default: 0.2)',
+    )
+
+    return parser.parse_args()
+
+
+async def run(env: Environment, args: argparse.Namespace) -> List[Result]:
+    await env.setup(args.dsn)
+
+    results: List[Result] = []
+
+    try:
+        for benchmark in build(env):
+            if args.only and not any(name in benchmark.name for name in args.only):
+                continue
+
+            results.append(await benchmark.run(args.iterations))
+            print(format_results(results[-1:]).splitlines()[-1], flush=True)
+    finally:
+        await env.teardown()
+
+    return results
+
+
+def main() -> int:
+    args = parse_args()
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    env = Environment(args.dsn, loop)
+    results = loop.run_until_complete(run(env, args))
+
+    print()
+    print(format_results(results))
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f'\nBaseline written to {args.baseline}')
+        return 0
+
+    regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+
+    if regressions:
+        print('\nRegressions:')
+        for regression in regressions:
+            print(f'  {regression}')
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
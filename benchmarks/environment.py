@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, cast
+
+import asyncio
+import pendulum
+import random
+
+from botus_receptus import Config
+
+from bothanasius import Bothanasius
+from bothanasius.db import (
+    db,
+    DelayedAction,
+    GuildPrefs,
+    LinkedRole,
+    Ltree,
+    SelfRole,
+    Warning,
+)
+
+from .fakes import FakeGuild, FakeMember, FakeMessage, FakeRole, FakeState
+
+PREFIX = '!'
+
+
+class Environment(object):
+    """
+    A real Bothanasius bound to a local Postgres. The first fake guild is seeded
+    with preferences, warnings, linked roles and pending delayed actions, any
+    others only with preferences
+    """
+
+    bot: Bothanasius
+    state: FakeState
+    guild: FakeGuild
+    mod_role: FakeRole
+    moderator: FakeMember
+    member: FakeMember
+    linked_roles: List[FakeRole]
+
+    guilds: List[FakeGuild]
+
+    def __init__(
+        self, dsn: str, loop: asyncio.AbstractEventLoop, *, guilds: int = 1
+    ) -> None:
+        config = cast(
+            Config,
+            {
+                'bot_name': 'bothanasius-bench',
+                'command_prefix': PREFIX,
+                'discord_api_key': '',
+                'db_url': dsn,
+            },
+        )
+
+        self.bot = Bothanasius(config, loop=loop)
+        self.state = FakeState()
+        self.guilds = [FakeGuild(self.state, members=200) for _ in range(guilds)]
+        self.guild = self.guilds[0]
+        self.mod_role = self.guild.add_role('Moderator')
+        self.moderator = self.guild.add_member('Moderator', roles=[self.mod_role])
+        self.member = self.guild.members[2]
+        self.linked_roles = [self.guild.add_role(f'Linked {i}') for i in range(3)]
+
+        self.bot._connection.user = self.guild.me
+        # LinkedRoles is not in the default extension list
+        if self.bot.get_cog('LinkedRoles') is None:
+            self.bot.load_extension('bothanasius.cogs.linked_roles')
+
+    async def setup(self, dsn: str) -> None:
+        if db.bind is None:
+            await db.set_bind(dsn)
+
+        await db.status(db.text('CREATE EXTENSION IF NOT EXISTS ltree'))
+        await db.gino.create_all()
+
+        for model in (GuildPrefs, Warning, LinkedRole, SelfRole, DelayedAction):
+            await db.status(db.text(f'TRUNCATE {model.__tablename__}'))
+
+        await self.__seed()
+        await self.bot.on_ready()
+
+    async def __seed(self) -> None:
+        guild = self.guild
+
+        await GuildPrefs.create(
+            guild_id=guild.id, prefix=PREFIX, mod_roles=[self.mod_role.id]
+        )
+
+        for other in self.guilds[1:]:
+            await GuildPrefs.create(guild_id=other.id, prefix=PREFIX)
+
+        now = pendulum.now()
+        rng = random.Random(0)
+        warnings: List[Dict[str, Any]] = [
+            dict(
+                guild_id=guild.id,
+                member_id=rng.choice(guild.members).id,
+                moderator_id=self.moderator.id,
+                reason='Benchmark',
+                timestamp=now.subtract(minutes=index),
+            )
+            for index in range(2000)
+        ]
+        await Warning.insert().gino.all(warnings)
+
+        path = Ltree(str(self.linked_roles[0].id))
+        await LinkedRole.create(
+            guild_id=guild.id, role_id=self.linked_roles[0].id, path=path
+        )
+        for role in self.linked_roles[1:]:
+            path = path + str(role.id)
+            await LinkedRole.create(guild_id=guild.id, role_id=role.id, path=path)
+
+        for role in guild.roles[1:11]:
+            await SelfRole.create(guild_id=guild.id, role_id=role.id)
+
+        for index in range(500):
+            await DelayedAction.create(
+                guild_id=guild.id,
+                created_at=now,
+                expires=now.add(days=1, minutes=index),
+                event='bench',
+                profile=dict(args=[guild.id, guild.members[index % 200].id], kwargs={}),
+            )
+
+    def message(self, content: str, author: FakeMember) -> FakeMessage:
+        return FakeMessage(
+            self.state, content=content, author=author, channel=author.guild.channels[0]
+        )
+
+    async def teardown(self) -> None:
+        await self.bot.close()
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+from collections import Counter
+from itertools import count
+from typing import Any, Dict, Iterable, List, Optional
+
+import discord
+
+_ids = count(100000000000000000)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+class FakeHTTP(object):
+    """
+    Records every REST call instead of making it
+    """
+
+    calls: 'Counter[str]'
+
+    def __init__(self) -> None:
+        self.calls = Counter()
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        async def call(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+            self.calls[name] += 1
+            return {'id': next_id()}
+
+        return call
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+
+class FakeState(object):
+    http: FakeHTTP
+
+    def __init__(self, http: Optional[FakeHTTP] = None) -> None:
+        self.http = http or FakeHTTP()
+
+    def create_message(self, *, channel: FakeChannel, data: Dict[str, Any]) -> Any:
+        return FakeMessage(
+            self, content='', author=channel.guild.me, channel=channel, id=data['id']
+        )
+
+
+class FakeRole(object):
+    def __init__(self, guild: FakeGuild, name: str, position: int) -> None:
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.position = position
+        self.permissions = discord.Permissions.none()
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, FakeRole) and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __lt__(self, other: FakeRole) -> bool:
+        return self.position < other.position
+
+    def __str__(self) -> str:
+        return self.name
+
+    @property
+    def mention(self) -> str:
+        return f'<@&{self.id}>'
+
+
+class FakeMember(object):
+    bot = False
+
+    def __init__(
+        self, guild: FakeGuild, name: str, roles: Iterable[FakeRole] = ()
+    ) -> None:
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.discriminator = '0001'
+        self.roles: List[FakeRole] = [guild.default_role, *roles]
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, FakeMember) and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __str__(self) -> str:
+        return f'{self.name}#{self.discriminator}'
+
+    @property
+    def mention(self) -> str:
+        return f'<@{self.id}>'
+
+    @property
+    def top_role(self) -> FakeRole:
+        return max(self.roles)
+
+    @property
+    def guild_permissions(self) -> discord.Permissions:
+        return discord.Permissions.all()
+
+    def copy(self, *, roles: Optional[Iterable[FakeRole]] = None) -> FakeMember:
+        member = FakeMember.__new__(FakeMember)
+        member.__dict__.update(self.__dict__)
+        member.roles = list(roles) if roles is not None else list(self.roles)
+        return member
+
+    async def add_roles(self, *roles: FakeRole, reason: Optional[str] = None) -> None:
+        self.guild.state.http.calls['add_role'] += len(roles)
+
+    async def remove_roles(
+        self, *roles: FakeRole, reason: Optional[str] = None
+    ) -> None:
+        self.guild.state.http.calls['remove_role'] += len(roles)
+
+    async def edit(self, *, reason: Optional[str] = None, **fields: Any) -> None:
+        self.guild.state.http.calls['edit_member'] += 1
+
+    async def send(self, *args: Any, **kwargs: Any) -> None:
+        self.guild.state.http.calls['send_dm'] += 1
+
+
+class FakeChannel(discord.abc.Messageable):
+    def __init__(self, guild: FakeGuild, name: str) -> None:
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self._state = guild.state
+        self._overwrites: Dict[Any, discord.PermissionOverwrite] = {}
+
+    async def _get_channel(self) -> FakeChannel:
+        return self
+
+    def __str__(self) -> str:
+        return self.name
+
+    @property
+    def mention(self) -> str:
+        return f'<#{self.id}>'
+
+    async def delete_messages(self, messages: Iterable[Any]) -> None:
+        self._state.http.calls['delete_messages'] += 1
+
+    @property
+    def overwrites(self) -> Dict[Any, discord.PermissionOverwrite]:
+        return dict(self._overwrites)
+
+    def overwrites_for(self, target: Any) -> discord.PermissionOverwrite:
+        overwrite = self._overwrites.get(target)
+
+        if overwrite is None:
+            return discord.PermissionOverwrite()
+
+        return discord.PermissionOverwrite(**dict(iter(overwrite)))
+
+    def permissions_for(self, member: Any) -> discord.Permissions:
+        return discord.Permissions.all()
+
+    async def set_permissions(
+        self,
+        target: Any,
+        *,
+        overwrite: Optional[discord.PermissionOverwrite] = None,
+        reason: Optional[str] = None,
+    ) -> None:
+        self._state.http.calls['edit_channel_permissions'] += 1
+
+        if overwrite is None or overwrite.is_empty():
+            self._overwrites.pop(target, None)
+        else:
+            self._overwrites[target] = overwrite
+
+
+class FakeMessage(object):
+    def __init__(
+        self,
+        state: FakeState,
+        *,
+        content: str,
+        author: FakeMember,
+        channel: FakeChannel,
+        id: Optional[int] = None,
+    ) -> None:
+        self.id = id if id is not None else next_id()
+        self._state = state
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+        self.mentions: List[FakeMember] = []
+        self.role_mentions: List[FakeRole] = []
+        self.channel_mentions: List[FakeChannel] = []
+        self.attachments: List[Any] = []
+        self.created_at = discord.utils.snowflake_time(self.id)
+
+    async def delete(self, *, delay: Optional[float] = None) -> None:
+        self._state.http.calls['delete_message'] += 1
+
+    async def edit(self, **fields: Any) -> None:
+        self._state.http.calls['edit_message'] += 1
+
+
+class FakeGuild(object):
+    def __init__(
+        self, state: FakeState, *, members: int = 100, roles: int = 20
+    ) -> None:
+        self.id = next_id()
+        self.name = f'Guild {self.id}'
+        self.state = state
+        self.default_role = FakeRole(self, '@everyone', 0)
+        self.roles: List[FakeRole] = [self.default_role] + [
+            FakeRole(self, f'Role {index}', index) for index in range(1, roles + 1)
+        ]
+        # keep the bot's role above anything added later
+        self.bot_role = FakeRole(self, 'Bothanasius', 1000)
+        self.me = FakeMember(self, 'Bothanasius', roles=[self.bot_role])
+        self.owner = FakeMember(self, 'Owner')
+        self.members: List[FakeMember] = [self.me, self.owner] + [
+            FakeMember(self, f'Member {index}') for index in range(members)
+        ]
+        self.channels: List[FakeChannel] = [FakeChannel(self, 'general')]
+        self._members = {member.id: member for member in self.members}
+        self._roles = {role.id: role for role in self.roles + [self.bot_role]}
+
+    @property
+    def text_channels(self) -> List[FakeChannel]:
+        return self.channels
+
+    @property
+    def system_channel(self) -> FakeChannel:
+        return self.channels[0]
+
+    def get_member(self, member_id: int) -> Optional[FakeMember]:
+        return self._members.get(member_id)
+
+    def get_member_named(self, name: str) -> Optional[FakeMember]:
+        return discord.utils.find(lambda m: str(m) == name, self.members)
+
+    def get_role(self, role_id: int) -> Optional[FakeRole]:
+        return self._roles.get(role_id)
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        return discord.utils.get(self.channels, id=channel_id)
+
+    def add_role(self, name: str) -> FakeRole:
+        role = FakeRole(self, name, len(self.roles))
+        self.roles.append(role)
+        self._roles[role.id] = role
+        return role
+
+    def add_member(self, name: str, roles: Iterable[FakeRole] = ()) -> FakeMember:
+        member = FakeMember(self, name, roles)
+        self.members.append(member)
+        self._members[member.id] = member
+        return member
+
+    async def create_role(self, *, name: str, **kwargs: Any) -> FakeRole:
+        self.state.http.calls['create_role'] += 1
+        return self.add_role(name)
+
+    async def kick(self, member: FakeMember, *, reason: Optional[str] = None) -> None:
+        self.state.http.calls['kick'] += 1
+
+    async def ban(self, user: Any, *, reason: Optional[str] = None, **kw: Any) -> None:
+        self.state.http.calls['ban'] += 1
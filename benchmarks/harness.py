@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import asyncio
+import attr
+import json
+import statistics
+import sys
+import time
+
+from bothanasius.db.instrumentation import query_budget
+
+Operation = Callable[[], Awaitable[Any]]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+
+    ordered = sorted(samples)
+    index = min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Result(object):
+    name: str
+    iterations: int
+    elapsed: float
+    p50: float
+    p99: float
+    mean: float
+    queries: float
+
+    @property
+    def throughput(self) -> float:
+        return self.iterations / self.elapsed if self.elapsed else 0.0
+
+    def to_json(self) -> Dict[str, float]:
+        return {
+            'throughput': self.throughput,
+            'p50': self.p50,
+            'p99': self.p99,
+            'queries': self.queries,
+        }
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Benchmark(object):
+    name: str
+    operation: Operation
+    iterations: int = 1000
+    warmup: int = 50
+    concurrency: int = 1
+
+    async def run(self, iterations: Optional[int] = None) -> Result:
+        iterations = iterations or self.iterations
+
+        for _ in range(min(self.warmup, iterations)):
+            await self.operation()
+
+        latencies: List[float] = []
+        queries = 0
+        per_worker = max(iterations // self.concurrency, 1)
+
+        async def worker() -> None:
+            nonlocal queries
+
+            for _ in range(per_worker):
+                with query_budget(sys.maxsize) as budget:
+                    start = time.perf_counter()
+                    await self.operation()
+                    latencies.append(time.perf_counter() - start)
+                queries += budget.count
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        elapsed = time.perf_counter() - start
+
+        return Result(
+            self.name,
+            len(latencies),
+            elapsed,
+            percentile(latencies, 0.5),
+            percentile(latencies, 0.99),
+            statistics.mean(latencies),
+            queries / len(latencies),
+        )
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Regression(object):
+    name: str
+    metric: str
+    baseline: float
+    current: float
+
+    def __str__(self) -> str:
+        return (
+            f'{self.name}: {self.metric} {self.current:.6g} '
+            f'(baseline {self.baseline:.6g})'
+        )
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, float]]:
+    if not path.exists():
+        return {}
+
+    with path.open() as f:
+        data: Dict[str, Dict[str, float]] = json.load(f)
+
+    return data
+
+
+def save_baseline(path: Path, results: List[Result]) -> None:
+    with path.open('w') as f:
+        json.dump({result.name: result.to_json() for result in results}, f, indent=2)
+        f.write('\n')
+
+
+def compare(
+    results: List[Result], baseline: Dict[str, Dict[str, float]], tolerance: float
+) -> List[Regression]:
+    regressions: List[Regression] = []
+
+    for result in results:
+        previous = baseline.get(result.name)
+
+        if previous is None:
+            continue
+
+        current = result.to_json()
+
+        if current['throughput'] < previous['throughput'] * (1 - tolerance):
+            regressions.append(
+                Regression(
+                    result.name,
+                    'throughput',
+                    previous['throughput'],
+                    current['throughput'],
+                )
+            )
+
+        for metric in ('p50', 'p99'):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(
+                    Regression(result.name, metric, previous[metric], current[metric])
+                )
+
+        # query counts are deterministic, any increase is a regression
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                Regression(
+                    result.name, 'queries', previous['queries'], current['queries']
+                )
+            )
+
+    return regressions
+
+
+def format_results(results: List[Result]) -> str:
+    lines = [
+        f'{"benchmark":<32} {"ops/s":>10} {"p50 ms":>9} {"p99 ms":>9} {"queries":>8}'
+    ]
+
+    for result in results:
+        lines.append(
+            f'{result.name:<32} {result.throughput:>10.1f} '
+            f'{result.p50 * 1000:>9.3f} {result.p99 * 1000:>9.3f} '
+            f'{result.queries:>8.2f}'
+        )
+
+    return '\n'.join(lines)
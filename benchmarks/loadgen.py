@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, DefaultDict, Dict, Iterator, List
+
+import argparse
+import asyncio
+import attr
+import json
+import os
+import random
+import sys
+import time
+import uvloop
+
+from bothanasius.db.instrumentation import recorder
+
+from .environment import Environment, PREFIX
+from .harness import percentile
+
+Event = Dict[str, Any]
+
+PROFILES: Dict[str, Dict[str, float]] = {
+    # relative weights of each event type
+    'chatter': {'message': 0.9, 'member_update': 0.1},
+    'moderation': {'message': 0.6, 'command': 0.3, 'member_update': 0.1},
+    'mass_mute': {'message': 0.3, 'mute': 0.7},
+    'mixed': {'message': 0.7, 'command': 0.05, 'member_update': 0.2, 'mute': 0.05},
+}
+
+MESSAGES = ('hello', 'lol', 'anyone around?', 'gg', 'check this out')
+COMMANDS = ('warnings', 'roles', 'settings')
+
+
+def synthesise(
+    profile: str, *, events: int, guilds: int, members: int, seed: int = 0
+) -> Iterator[Event]:
+    """
+    A guild availability storm followed by `events` events drawn from `profile`
+    """
+    rng = random.Random(seed)
+    weights = PROFILES[profile]
+    kinds = list(weights)
+
+    for guild in range(guilds):
+        yield {'type': 'guild_available', 'guild': guild}
+
+    for kind in rng.choices(kinds, weights=[weights[k] for k in kinds], k=events):
+        guild = rng.randrange(guilds)
+        member = rng.randrange(members)
+
+        if kind == 'message':
+            yield {
+                'type': 'message',
+                'guild': guild,
+                'member': member,
+                'content': rng.choice(MESSAGES),
+            }
+        elif kind == 'command':
+            yield {'type': 'command', 'guild': guild, 'content': rng.choice(COMMANDS)}
+        elif kind == 'member_update':
+            yield {'type': 'member_update', 'guild': guild, 'member': member}
+        elif kind == 'mute':
+            yield {
+                'type': 'mute',
+                'guild': guild,
+                'member': member,
+                'minutes': rng.randint(5, 120),
+            }
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Report(object):
+    rate: float
+    events: int
+    elapsed: float
+    # how far behind schedule the generator fell; grows once the bot saturates
+    schedule_lag: List[float]
+    handler_latency: DefaultDict[str, List[float]]
+    rest_calls: int
+    queries: int
+
+    def format(self) -> str:
+        lines = [
+            f'rate {self.rate:g}/s: {self.events} events in {self.elapsed:.1f}s '
+            f'({self.events / self.elapsed:.1f}/s achieved)',
+            f'  schedule lag p50 {percentile(self.schedule_lag, 0.5) * 1000:.2f}ms '
+            f'p99 {percentile(self.schedule_lag, 0.99) * 1000:.2f}ms',
+            f'  REST calls/event {self.rest_calls / self.events:.3f}, '
+            f'DB queries/event {self.queries / self.events:.3f}',
+        ]
+
+        for event, latencies in sorted(self.handler_latency.items()):
+            lines.append(
+                f'  {event:<28} n={len(latencies):<7} '
+                f'p50 {percentile(latencies, 0.5) * 1000:8.3f}ms '
+                f'p99 {percentile(latencies, 0.99) * 1000:8.3f}ms'
+            )
+
+        return '\n'.join(lines)
+
+
+class Replayer(object):
+    env: Environment
+    handler_latency: DefaultDict[str, List[float]]
+    in_flight: int
+
+    def __init__(self, env: Environment) -> None:
+        self.env = env
+        self.handler_latency = defaultdict(list)
+        self.in_flight = 0
+
+        run_event = env.bot._run_event
+
+        async def timed_run_event(
+            coro: Callable[..., Awaitable[Any]],
+            event_name: str,
+            *args: Any,
+            **kwargs: Any,
+        ) -> None:
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                await run_event(coro, event_name, *args, **kwargs)
+            finally:
+                self.handler_latency[event_name].append(time.perf_counter() - start)
+                self.in_flight -= 1
+
+        setattr(env.bot, '_run_event', timed_run_event)
+
+    def dispatch(self, event: Event) -> None:
+        env = self.env
+        bot = env.bot
+        guild = env.guilds[event['guild'] % len(env.guilds)]
+        kind = event['type']
+
+        if kind == 'guild_available':
+            bot.dispatch('guild_available', guild)
+        elif kind == 'message':
+            author = guild.members[2 + event['member'] % (len(guild.members) - 2)]
+            bot.dispatch('message', env.message(event['content'], author))
+        elif kind == 'command':
+            bot.dispatch(
+                'message', env.message(f'{PREFIX}{event["content"]}', guild.owner)
+            )
+        elif kind == 'mute':
+            member = guild.members[2 + event['member'] % (len(guild.members) - 2)]
+            bot.dispatch(
+                'message',
+                env.message(
+                    f'{PREFIX}mute {member.mention} {event["minutes"]}', guild.owner
+                ),
+            )
+        elif kind == 'member_update':
+            member = guild.members[2 + event['member'] % (len(guild.members) - 2)]
+            role = random.choice(guild.roles[1:])
+            bot.dispatch(
+                'member_update', member, member.copy(roles=member.roles + [role])
+            )
+        else:
+            raise ValueError(f'Unknown event type {kind!r}')
+
+    async def drain(self) -> None:
+        # handlers dispatch further events (command_completion, etc.), so only stop
+        # once nothing has been running for a little while
+        quiet = 0
+
+        while quiet < 5:
+            await asyncio.sleep(0.01)
+            quiet = quiet + 1 if self.in_flight == 0 else 0
+
+    async def replay(self, events: List[Event], rate: float) -> Report:
+        self.handler_latency = defaultdict(list)
+        rest_before = self.env.state.http.total
+        queries_before = sum(
+            stats.latency.count for stats in recorder.statements.values()
+        )
+        schedule_lag: List[float] = []
+
+        start = time.perf_counter()
+
+        for index, event in enumerate(events):
+            target = start + index / rate
+            delay = target - time.perf_counter()
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            schedule_lag.append(max(time.perf_counter() - target, 0))
+            self.dispatch(event)
+
+        await self.drain()
+
+        elapsed = time.perf_counter() - start
+
+        return Report(
+            rate,
+            len(events),
+            elapsed,
+            schedule_lag,
+            self.handler_latency,
+            self.env.state.http.total - rest_before,
+            sum(stats.latency.count for stats in recorder.statements.values())
+            - queries_before,
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.loadgen',
+        description='Replay gateway traffic against Bothanasius with fake Discord '
+        'HTTP and gateway layers',
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    synth = subparsers.add_parser('synthesise', help='write an event stream')
+    synth.add_argument('output', type=Path)
+    synth.add_argument('--profile', choices=sorted(PROFILES), default='mixed')
+    synth.add_argument('--events', type=int, default=10000)
+    synth.add_argument('--guilds', type=int, default=10)
+    synth.add_argument('--members', type=int, default=200)
+    synth.add_argument('--seed', type=int, default=0)
+
+    replay = subparsers.add_parser('replay', help='replay an event stream')
+    replay.add_argument('input', type=Path)
+    replay.add_argument(
+        '--dsn',
+        default=os.environ.get(
+            'BOTHANASIUS_BENCH_DB', 'postgresql://localhost/bothanasius_bench'
+        ),
+        help='database to run against; its tables are truncated',
+    )
+    replay.add_argument('--guilds', type=int, default=10)
+    replay.add_argument(
+        '--rates',
+        default='100,250,500,1000',
+        help='comma separated events per second; the stream is replayed once per '
+        'rate to find the saturation point',
+    )
+
+    return parser.parse_args()
+
+
+async def run_replay(env: Environment, args: argparse.Namespace) -> None:
+    await env.setup(args.dsn)
+
+    with args.input.open() as f:
+        events = [json.loads(line) for line in f if line.strip()]
+
+    replayer = Replayer(env)
+
+    try:
+        for rate in (float(rate) for rate in args.rates.split(',')):
+            report = await replayer.replay(events, rate)
+            print(report.format(), flush=True)
+    finally:
+        await env.teardown()
+
+
+def main() -> int:
+    args = parse_args()
+
+    if args.command == 'synthesise':
+        with args.output.open('w') as f:
+            for event in synthesise(
+                args.profile,
+                events=args.events,
+                guilds=args.guilds,
+                members=args.members,
+                seed=args.seed,
+            ):
+                f.write(json.dumps(event))
+                f.write('\n')
+        return 0
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    env = Environment(args.dsn, loop, guilds=args.guilds)
+    loop.run_until_complete(run_replay(env, args))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from typing import List
+
+import pendulum
+
+from bothanasius.checks import check_mod_only
+from bothanasius.db import DelayedAction, Ltree, Warning
+
+from .environment import Environment, PREFIX
+from .harness import Benchmark
+
+
+def ltree_operations() -> None:
+    tree = Ltree('1.2.3.4.5')
+    tree.descendant_of('1.2.3')
+    Ltree('1.2.3').ancestor_of(tree)
+    tree.lca('1.2.3', '1.2.3.4', '1.2.3')
+    tree + Ltree('6.7')
+    tree[1:3]
+    tree.index('3.4')
+
+
+def build(env: Environment) -> List[Benchmark]:
+    bot = env.bot
+    guild = env.guild
+    linked_roles = env.bot.get_cog('LinkedRoles')
+
+    async def process_command() -> None:
+        await bot.process_commands(env.message(f'{PREFIX}warnings', env.moderator))
+
+    async def process_chatter() -> None:
+        await bot.process_commands(env.message('just chatting', env.member))
+
+    async def mod_check() -> None:
+        ctx = await bot.get_context(env.message(f'{PREFIX}warnings', env.moderator))
+        await check_mod_only(ctx)
+
+    async def member_update() -> None:
+        before = env.member.copy()
+        after = env.member.copy(roles=before.roles + [env.linked_roles[-1]])
+        await linked_roles.on_member_update(before, after)
+
+    async def schedule_and_remove() -> None:
+        action = await bot.create_action(
+            pendulum.now().add(hours=1), 'bench', guild.id, env.member.id
+        )
+        await bot.remove_action(action)
+
+    async def next_action() -> None:
+        await DelayedAction.get_active()
+
+    async def guild_counts() -> None:
+        await Warning.get_guild_counts(guild)
+
+    async def member_history() -> None:
+        await Warning.get_for_member(guild, env.member)
+
+    async def ltree() -> None:
+        ltree_operations()
+
+    return [
+        Benchmark('process_commands.command', process_command, iterations=500),
+        Benchmark('process_commands.chatter', process_chatter, iterations=5000),
+        Benchmark('checks.check_mod_only', mod_check, iterations=2000),
+        Benchmark('linked_roles.on_member_update', member_update, iterations=2000),
+        Benchmark('scheduler.create_remove', schedule_and_remove, iterations=1000),
+        Benchmark('scheduler.get_active', next_action, iterations=2000),
+        Benchmark('warnings.get_guild_counts', guild_counts, iterations=500),
+        Benchmark('warnings.get_for_member', member_history, iterations=2000),
+        Benchmark('ltree.operations', ltree, iterations=20000),
+    ]
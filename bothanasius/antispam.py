@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+from typing_extensions import Final
+
+import discord
+import time
+import zlib
+
+from .metrics import Counter
+from .ratelimit import TokenBucket
+
+floods_detected: Final = Counter(
+    'bothanasius_floods_detected_total', 'Members caught flooding', ('kind',)
+)
+
+
+class MemberActivity(object):
+    __slots__ = ('bucket', 'recent')
+
+    bucket: TokenBucket
+    # (crc32 of the content, time sent) of the latest messages, oldest first
+    recent: Deque[Tuple[int, float]]
+
+    def __init__(self, rate: float, burst: float, duplicates: int) -> None:
+        self.bucket = TokenBucket(rate, burst)
+        self.recent = deque(maxlen=duplicates)
+
+
+def _content_hash(message: discord.Message) -> int:
+    content = ' '.join(message.content.lower().split())
+
+    if message.attachments:
+        content += ''.join(
+            f'|{attachment.filename}:{attachment.size}'
+            for attachment in message.attachments
+        )
+
+    return zlib.crc32(content.encode('utf-8'))
+
+
+class FloodDetector(object):
+    """
+    Spots members who send messages faster than `rate` per second (bursting to
+    `burst`) or who send the same message `duplicates` times within
+    `duplicate_window` seconds. Only the `max_members` most recently active
+    members are tracked.
+    """
+
+    # how long members caught flooding are muted for, None for indefinitely
+    mute_minutes: Optional[int]
+    rate: float
+    burst: float
+    duplicates: int
+    duplicate_window: float
+    max_members: int
+
+    # (guild ID, member ID) -> activity, least recently active first
+    _members: 'OrderedDict[Tuple[int, int], MemberActivity]'
+
+    def __init__(
+        self,
+        *,
+        mute_minutes: Optional[int] = 10,
+        rate: float = 1.0,
+        burst: float = 8.0,
+        duplicates: int = 4,
+        duplicate_window: float = 30.0,
+        max_members: int = 10000,
+    ) -> None:
+        self.mute_minutes = mute_minutes
+        self.rate = rate
+        self.burst = burst
+        self.duplicates = duplicates
+        self.duplicate_window = duplicate_window
+        self.max_members = max_members
+        self._members = OrderedDict()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> FloodDetector:
+        return cls(
+            mute_minutes=config.get('mute_minutes', 10),
+            rate=config.get('rate', 1.0),
+            burst=config.get('burst', 8.0),
+            duplicates=config.get('duplicates', 4),
+            duplicate_window=config.get('duplicate_window', 30.0),
+            max_members=config.get('max_members', 10000),
+        )
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def check(self, message: discord.Message) -> Optional[str]:
+        """
+        Records `message` and returns why its author is flooding, if they are
+        """
+        assert message.guild is not None
+
+        key = (message.guild.id, message.author.id)
+        activity = self._members.get(key)
+
+        if activity is None:
+            activity = MemberActivity(self.rate, self.burst, self.duplicates)
+            self._members[key] = activity
+
+            if len(self._members) > self.max_members:
+                self._members.popitem(last=False)
+        else:
+            self._members.move_to_end(key)
+
+        reason: Optional[str] = None
+
+        if not activity.bucket.consume():
+            floods_detected.inc(kind='rate')
+            reason = 'Sending messages too quickly'
+        else:
+            now = time.monotonic()
+            content_hash = _content_hash(message)
+            activity.recent.append((content_hash, now))
+
+            repeats = sum(
+                1
+                for sent_hash, sent_at in activity.recent
+                if sent_hash == content_hash and now - sent_at <= self.duplicate_window
+            )
+
+            if repeats >= self.duplicates:
+                floods_detected.inc(kind='duplicate')
+                reason = 'Sending the same message repeatedly'
+
+        if reason is not None:
+            # start over so that the next few messages don't trip it again
+            del self._members[key]
+
+        return reason
@@ -3,19 +3,62 @@ from __future__ import annotations
 from botus_receptus import abc, Config
 from botus_receptus.gino import Bot
 from discord.ext import commands
-from typing import Any, Optional, Union, Dict, Tuple, overload
+from pathlib import Path
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Collection,
+    List,
+    Optional,
+    Sequence,
+    Union,
+    Dict,
+    Tuple,
+    overload,
+)
 from typing_extensions import Final
 
 import asyncio
 import asyncpg
 import discord
+import json
 import logging
 import pendulum
-
-from .db.base import db
+import time
+
+from . import snapshot
+from .antispam import FloodDetector
+from .bulk_delete import DeletionQueue
+from .cache import GuildCache, snapshot_caches
+from .config import get_section
+from .db.base import db, Shards, on_shards
 from .db.admin import GuildPrefs
+from .db.cache_changes import CacheChange
 from .db.delayed_action import DelayedAction
+from .db.instrumentation import InstrumentedConnection, query_budget, recorder
+from .db.invalidation import bus
+from .db.listener import Listener
+from .db.pool import InstrumentedPool
 from .context import Context
+from .escalation import WarningCounts
+from .hierarchy import RoleHierarchy
+from .metrics import (
+    MetricsServer,
+    action_lateness,
+    check_failures,
+    command_latency,
+    event_errors,
+    event_latency,
+    instrument_http,
+    message_latency,
+)
+from .monitor import LoopMonitor
+from .overwrites import OverwriteSync, fingerprint, rules_for
+from .punishments import REVERSAL_EVENTS, PunishmentIndex
+from .raids import RaidDetector
+from .logs import QueueLogging
+from .users import UserCache
 
 log = logging.getLogger(__name__)
 
@@ -26,6 +69,10 @@ MAX_SLEEP_TIME: Final = 86400 * 40  # 40 days
 
 extensions: Final = ('meta', 'admin', 'mod', 'roles')
 
+# how far before a snapshot was taken to look for changes, to cover changes
+# whose notifications had not arrived yet
+SNAPSHOT_MARGIN: Final = 60.0
+
 
 class Bothanasius(
     Bot[Context],
@@ -37,17 +84,115 @@ class Bothanasius(
     db = db
     context_cls = Context
     prefix_map: Dict[int, str]
-
-    _task: 'asyncio.Task[None]'
+    guild_prefs: GuildCache[GuildPrefs]
+    deletions: DeletionQueue
+    user_cache: UserCache
+    role_hierarchy: RoleHierarchy
+    overwrites: Optional[OverwriteSync]
+    flood_detector: Optional[FloodDetector]
+    raid_detector: Optional[RaidDetector]
+    punishments: PunishmentIndex
+    warning_counts: WarningCounts
+
+    _task: Optional['asyncio.Task[None]']
     _have_data: asyncio.Event
     _current_action: Optional[DelayedAction]
+    _listener: Listener
+    _max_queries_per_command: Optional[int]
+    _replica_urls: List[str]
+    _replica_check_interval: float
+    _replica_task: Optional['asyncio.Task[None]']
+    _metrics_server: Optional[MetricsServer]
+    _loop_monitor: Optional[LoopMonitor]
+    _queue_logging: QueueLogging
+    _snapshot_path: Optional[Path]
+    _snapshot_checked: bool
 
     def __init__(self, config: Config, *args: Any, **kwargs: Any) -> None:
         self.prefix_map = {}
+        self.guild_prefs = GuildCache(
+            GuildPrefs.__tablename__,
+            encode=GuildPrefs.to_dict,
+            decode=lambda values: GuildPrefs(**values),
+        )
+
+        db_config = get_section(config, 'db')
+        db.engine_options['connection_class'] = InstrumentedConnection
+        recorder.slow_query_threshold = db_config.get('slow_query_threshold')
+        self._max_queries_per_command = db_config.get('max_queries_per_command')
+        self._replica_urls = db_config.get('replicas', [])
+        self._replica_check_interval = db_config.get('replica_check_interval', 5.0)
+        self._replica_task = None
+        db.max_replica_lag = db_config.get('max_replica_lag', db.max_replica_lag)
+
+        pool_config = dict(db_config.get('pool', {}))
+        InstrumentedPool.acquire_timeout = pool_config.pop('acquire_timeout', None)
+        InstrumentedPool.slow_acquire_threshold = pool_config.pop(
+            'slow_acquire_threshold', InstrumentedPool.slow_acquire_threshold
+        )
+        # the remaining keys are asyncpg pool options
+        db.engine_options.update(pool_class=InstrumentedPool, **pool_config)
 
         super().__init__(config, *args, **kwargs)
 
+        self._task = None
         self._have_data = asyncio.Event(loop=self.loop)
+        self._current_action = None
+
+        self._listener = Listener(config['db_url'], loop=self.loop)
+        self._listener.listen('delayed_actions', self.__on_action_notification)
+        # notifications may have been missed while disconnected
+        self._listener.on_connect(self.__restart_action_loop)
+        bus.attach(self._listener)
+        bus.subscribe(GuildPrefs.__tablename__, self.__on_prefs_invalidated)
+
+        instrument_http(self.http)
+
+        metrics_config = get_section(config, 'metrics')
+        self._metrics_server = (
+            MetricsServer(
+                metrics_config.get('host', '127.0.0.1'), metrics_config['port']
+            )
+            if 'port' in metrics_config
+            else None
+        )
+        self._loop_monitor = LoopMonitor.from_config(
+            self.loop, get_section(config, 'monitor')
+        )
+        self._queue_logging = QueueLogging(
+            get_section(config, 'logging').get('sampling', {})
+        )
+
+        snapshot_path = get_section(config, 'snapshot').get('path')
+        self._snapshot_path = (
+            self.__shard_path(Path(snapshot_path)) if snapshot_path else None
+        )
+        self._snapshot_checked = False
+
+        self.deletions = DeletionQueue(
+            self.loop, delay=get_section(config, 'deletion').get('flush_delay', 1.0)
+        )
+        self.user_cache = UserCache.from_config(self, get_section(config, 'users'))
+        self.role_hierarchy = RoleHierarchy()
+        self.overwrites = OverwriteSync.from_config(
+            self.loop, get_section(config, 'overwrites')
+        )
+
+        antispam_config = get_section(config, 'antispam')
+        self.flood_detector = (
+            FloodDetector.from_config(antispam_config)
+            if antispam_config.get('enabled', False)
+            else None
+        )
+        self.punishments = PunishmentIndex()
+        self.warning_counts = WarningCounts(loop=self.loop)
+
+        raids_config = get_section(config, 'raids')
+        self.raid_detector = (
+            RaidDetector.from_config(raids_config)
+            if raids_config.get('enabled', False)
+            else None
+        )
 
         for extension in extensions:
             try:
@@ -59,23 +204,193 @@ class Bothanasius(
         if message.author.bot:
             return
 
-        ctx = await self.get_context(message)
+        start = time.perf_counter()
 
-        if ctx.command is None:
-            return
+        try:
+            ctx = await self.get_context(message)
+
+            if ctx.command is None:
+                return
+
+            await self.__invoke(ctx)
+        finally:
+            message_latency.observe(time.perf_counter() - start)
+
+    async def __invoke(self, ctx: Context) -> None:
+        assert ctx.command is not None
+
+        name = ctx.command.qualified_name
+        start = time.perf_counter()
+
+        try:
+            if self._max_queries_per_command is None:
+                await self.invoke(ctx)
+            else:
+                with query_budget(self._max_queries_per_command, label=name):
+                    await self.invoke(ctx)
+        finally:
+            command_latency.observe(
+                time.perf_counter() - start,
+                command=name,
+                outcome='error' if ctx.command_failed else 'success',
+            )
+
+    async def _run_event(
+        self,
+        coro: Callable[..., Awaitable[Any]],
+        event_name: str,
+        *args: Any,
+        **kwargs: Any,
+    ) -> None:
+        handler = getattr(coro, '__qualname__', event_name)
+        start = time.perf_counter()
+
+        try:
+            await coro(*args, **kwargs)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            event_errors.inc(event=event_name, handler=handler)
+
+            try:
+                await self.on_error(event_name, *args, **kwargs)
+            except asyncio.CancelledError:
+                pass
+        finally:
+            event_latency.observe(
+                time.perf_counter() - start, event=event_name, handler=handler
+            )
+
+    async def start(self, *args: Any, **kwargs: Any) -> None:
+        self._queue_logging.start()
 
-        await self.invoke(ctx)
+        if self._loop_monitor is not None:
+            self._loop_monitor.start()
+
+        if self._metrics_server is not None:
+            await self._metrics_server.start()
+
+        if self._replica_urls:
+            for url in self._replica_urls:
+                await db.add_replica(url, loop=self.loop)
+
+            self._replica_task = self.loop.create_task(self.__check_replicas())
+
+        await super().start(*args, **kwargs)
+
+    async def __check_replicas(self) -> None:
+        while True:
+            try:
+                await db.check_replicas()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception('Could not check replicas')
+
+            await asyncio.sleep(self._replica_check_interval)
 
     async def close(self) -> None:
-        self._task.cancel()
+        await self.deletions.close()
+        await self.__write_snapshot()
+        await self._listener.stop()
+
+        if self._replica_task is not None:
+            self._replica_task.cancel()
+            await db.close_replicas()
+
+        if self._task is not None:
+            self._task.cancel()
+
+        if self._metrics_server is not None:
+            await self._metrics_server.stop()
+
+        if self._loop_monitor is not None:
+            self._loop_monitor.stop()
+
         await super().close()
 
+        self._queue_logging.stop()
+
+    @property
+    def shards(self) -> Optional[Shards]:
+        """
+        The shards this process is responsible for, or None if it sees every guild
+        """
+        if self.shard_count is None:
+            return None
+
+        if isinstance(self, discord.AutoShardedClient):
+            if self.shard_ids is None:
+                return None
+
+            return self.shard_count, self.shard_ids
+
+        return self.shard_count, [self.shard_id or 0]
+
+    def owns_guild(self, guild_id: int) -> bool:
+        shards = self.shards
+
+        if shards is None:
+            return True
+
+        shard_count, shard_ids = shards
+        return (guild_id >> 22) % shard_count in shard_ids
+
     async def get_prefix(self, message: discord.Message) -> str:
         if not message.guild:
             return self.default_prefix
 
         return self.prefix_map.get(message.guild.id, self.default_prefix)
 
+    async def get_guild_prefs(self, guild: discord.Guild) -> GuildPrefs:
+        prefs = await self.guild_prefs.get(
+            guild.id, lambda: GuildPrefs.for_guild(guild)
+        )
+
+        # the guild object is replaced when a guild becomes available again
+        return prefs.with_guild(guild)
+
+    def __on_prefs_invalidated(self, guild_id: Optional[int]) -> None:
+        if guild_id is None or self.owns_guild(guild_id):
+            self.loop.create_task(self.__load_prefixes(guild_id))
+
+    async def __refresh_prefixes(self, guild_ids: Collection[int]) -> None:
+        prefixes = {
+            prefs.guild_id: prefs.prefix
+            for prefs in await GuildPrefs.query.where(
+                GuildPrefs.guild_id.in_(list(guild_ids))
+            ).gino.all()
+        }
+
+        for guild_id in guild_ids:
+            prefix = prefixes.get(guild_id)
+
+            if prefix is not None:
+                self.prefix_map[guild_id] = prefix
+            else:
+                self.prefix_map.pop(guild_id, None)
+
+    async def __load_prefixes(self, guild_id: Optional[int] = None) -> None:
+        if guild_id is not None:
+            await self.__refresh_prefixes([guild_id])
+            return
+
+        query = GuildPrefs.query
+        shards = self.shards
+
+        if shards is not None:
+            query = query.where(on_shards(GuildPrefs.guild_id, shards))
+
+        prefix_map: Dict[int, str] = {}
+
+        async with db.reader.acquire() as conn:
+            async with conn.transaction():
+                async for prefs in conn.iterate(query):
+                    if prefs.prefix is not None:
+                        prefix_map[prefs.guild_id] = prefs.prefix
+
+        self.prefix_map = prefix_map
+
     def get_guild_member(
         self, guild_id: int, member_id: int
     ) -> Union[
@@ -98,19 +413,24 @@ class Bothanasius(
     async def __action_loop(self) -> None:
         try:
             while not self.is_closed():
+                self._current_action = None
+                action = await self.__wait_for_action()
+                self._current_action = action
                 now = pendulum.now()
-                action = self._current_action = await self.__wait_for_action()
 
                 if action.expires >= now:
                     to_sleep = (action.expires - now).total_seconds()
-                    print(f'waiting {to_sleep} seconds')
+                    log.debug('Waiting %s seconds for action %s', to_sleep, action.id)
                     await asyncio.sleep(min(to_sleep, MAX_SLEEP_TIME))
 
                     if to_sleep > MAX_SLEEP_TIME:
-                        print('rechecking after waiting max')
+                        log.debug('Rechecking actions after waiting the maximum')
                         continue
 
-                await self.__dispatch_action(action)
+                # the DELETE notification from claiming it must not restart the loop
+                self._current_action = None
+                # a restart must not cancel it between claiming and dispatching
+                await asyncio.shield(self.__dispatch_action(action))
         except asyncio.CancelledError:
             pass
         except (OSError, discord.ConnectionClosed, asyncpg.PostgresConnectionError):
@@ -122,32 +442,54 @@ class Bothanasius(
 
         self._task = self.loop.create_task(self.__action_loop())
 
-    async def __wait_for_action(self) -> DelayedAction:
-        action = await DelayedAction.get_active()
+    def __on_action_notification(self, payload: str) -> None:
+        data = json.loads(payload)
+
+        if not self.owns_guild(int(data['guild_id'])):
+            return
 
-        if action is not None:
+        current = self._current_action
+
+        if data['op'] == 'DELETE':
+            if current is not None and data['id'] == current.id:
+                self.__restart_action_loop()
+        elif current is None:
             self._have_data.set()
-            return action
+        elif pendulum.parse(data['expires'], tz='local') < current.expires:
+            self.__restart_action_loop()
 
-        self._have_data.clear()
-        self._current_action = None
-        print('waiting for have_data')
-        await self._have_data.wait()
+    async def __wait_for_action(self) -> DelayedAction:
+        while True:
+            # clear before querying so that a notification arriving during the
+            # query still wakes us up
+            self._have_data.clear()
+            action = await DelayedAction.get_active(self.shards)
 
-        action = await DelayedAction.get_active()
-        assert action is not None
+            # an action scheduled during the query may come before the result
+            if self._have_data.is_set():
+                continue
 
-        return action
+            if action is not None:
+                return action
+
+            log.debug('Waiting for an action to be scheduled')
+            await self._have_data.wait()
 
     async def __dispatch_action(
         self, action: DelayedAction, *, seconds: Optional[float] = None
     ) -> None:
-        if action.id != -1:
-            await action.delete()
+        if action.id != -1 and await DelayedAction.claim(action.id) is None:
+            # another process fired it or it was removed while we were waiting
+            return
 
         if seconds is not None:
             await asyncio.sleep(seconds)
 
+        action_lateness.observe(
+            max((pendulum.now() - action.expires).total_seconds(), 0),
+            event=action.event,
+        )
+
         self.dispatch(f'{action.event}_action_complete', action)
 
     async def create_action(
@@ -155,10 +497,13 @@ class Bothanasius(
     ) -> DelayedAction:
         now = pendulum.now()
         delta = (when - now).total_seconds()
+        # actions are always scheduled with the guild id as the first argument
+        guild_id = args[0]
 
         if delta <= 60:
             action = DelayedAction(
                 id=-1,
+                guild_id=guild_id,
                 created_at=now,
                 expires=when,
                 event=event,
@@ -169,19 +514,45 @@ class Bothanasius(
             return action
 
         action = await DelayedAction.create(
+            guild_id=guild_id,
             created_at=now,
             expires=when,
             event=event,
             profile=dict(args=list(args), kwargs=kwargs),
         )
 
-        if delta <= MAX_SLEEP_TIME:
-            self._have_data.set()
+        # the action loop is woken up by the delayed_actions notification
+        return action
 
-        if self._current_action and when < self._current_action.expires:
-            self.__restart_action_loop()
+    async def create_actions(
+        self,
+        when: pendulum.DateTime,
+        event: str,
+        args: Sequence[Sequence[Any]],
+        **kwargs: Any,
+    ) -> None:
+        """
+        Schedules `event` once for each set of `args`, writing them all at once
+        """
+        now = pendulum.now()
 
-        return action
+        if (when - now).total_seconds() <= 60:
+            for action_args in args:
+                await self.create_action(when, event, *action_args, **kwargs)
+            return
+
+        await DelayedAction.create_many(
+            [
+                dict(
+                    guild_id=action_args[0],
+                    created_at=now,
+                    expires=when,
+                    event=event,
+                    profile=dict(args=list(action_args), kwargs=kwargs),
+                )
+                for action_args in args
+            ]
+        )
 
     async def create_or_update_action(
         self, when: pendulum.DateTime, event: str, *args: Any, **kwargs: Any
@@ -205,23 +576,116 @@ class Bothanasius(
         self, event: Union[str, DelayedAction], *args: Any
     ) -> None:
         if isinstance(event, str):
-            removed = await DelayedAction.delete_by_event(event, *args)
+            await DelayedAction.delete_by_event(event, *args)
         else:
             await event.delete()
-            removed = event
 
-        if removed and self._current_action and removed.id == self._current_action.id:
-            self.__restart_action_loop()
+    def __shard_path(self, path: Path) -> Path:
+        shards = self.shards
+
+        if shards is None:
+            return path
+
+        shard_ids = sorted(shards[1])
+        name = f'{path.stem}-{shard_ids[0]}-{shard_ids[-1]}{path.suffix}'
+        return path.with_name(name)
+
+    def __snapshot_shards(self) -> Optional[List[int]]:
+        shards = self.shards
+        return None if shards is None else [shards[0], *sorted(shards[1])]
+
+    async def __write_snapshot(self) -> None:
+        # without the listener there is no telling what went stale
+        if self._snapshot_path is None or not self._listener.connected:
+            return
+
+        try:
+            data = {
+                'taken_at': await CacheChange.now(),
+                'shards': self.__snapshot_shards(),
+                'prefixes': {
+                    str(guild_id): prefix
+                    for guild_id, prefix in self.prefix_map.items()
+                },
+                'caches': {
+                    table: cache.export() for table, cache in snapshot_caches.items()
+                },
+            }
+
+            await self.loop.run_in_executor(
+                None, snapshot.write, self._snapshot_path, data
+            )
+        except Exception:
+            log.exception('Failed to write snapshot %s', self._snapshot_path)
+        else:
+            log.info('Wrote snapshot %s', self._snapshot_path)
+
+    async def __restore_snapshot(self) -> bool:
+        if self._snapshot_path is None or self._snapshot_checked:
+            return False
+
+        self._snapshot_checked = True
+
+        data = await self.loop.run_in_executor(None, snapshot.read, self._snapshot_path)
+
+        if data is None:
+            return False
+
+        if data['shards'] != self.__snapshot_shards():
+            log.info('Ignoring snapshot taken with different shards')
+            return False
+
+        changed = await CacheChange.changed_since(data['taken_at'] - SNAPSHOT_MARGIN)
+
+        self.prefix_map = {
+            int(guild_id): prefix for guild_id, prefix in data['prefixes'].items()
+        }
+        changed_prefs = [
+            guild_id
+            for guild_id in changed.get(GuildPrefs.__tablename__, ())
+            if self.owns_guild(guild_id)
+        ]
+
+        if changed_prefs:
+            await self.__refresh_prefixes(changed_prefs)
+
+        restored = {
+            table: cache.restore(
+                data['caches'].get(table, {}), skip=changed.get(table, ())
+            )
+            for table, cache in snapshot_caches.items()
+        }
+
+        log.info(
+            'Restored snapshot: %d prefixes (%d refetched), cache entries %s',
+            len(self.prefix_map),
+            len(changed_prefs),
+            restored,
+        )
+
+        return True
 
     async def on_ready(self) -> None:
-        async with db.transaction():
-            async for prefs in GuildPrefs.query.gino.iterate():
-                if prefs.prefix is not None:
-                    self.prefix_map[prefs.guild_id] = prefs.prefix
+        if not await self.__restore_snapshot():
+            await self.__load_prefixes()
 
-        self._task = self.loop.create_task(self.__action_loop())
+        count = self.punishments.load(
+            await DelayedAction.get_for_events(REVERSAL_EVENTS, self.shards)
+        )
+        log.info('Loaded %d active punishments', count)
+
+        # the listener only wakes the action loop up, actions still fire without it
+        if self._task is None:
+            self.__restart_action_loop()
+
+        self._listener.start()
 
     async def on_command_error(self, ctx: Context, error: Exception) -> None:
+        if isinstance(error, commands.CheckFailure):
+            check_failures.inc(
+                command=ctx.command.qualified_name if ctx.command else ''
+            )
+
         if isinstance(error, (commands.UserInputError, commands.ConversionError)):
             await ctx.send_help(ctx.command)
         elif isinstance(error, commands.NoPrivateMessage):
@@ -279,6 +743,75 @@ class Bothanasius(
                 time_out_role=time_out_role.id,
                 set_=('prefix', 'mute_role', 'time_out_role'),
             )
+            bus.publish(GuildPrefs.__tablename__, guild.id)
+
+        await self.__sync_overwrites(guild)
+
+    async def __find_guild_prefs(self, guild: discord.Guild) -> Optional[GuildPrefs]:
+        """
+        Like `get_guild_prefs`, but None for a guild that has no preferences, such
+        as one that was joined while the bot was offline
+        """
+        if self.guild_prefs.peek(guild.id) is None:
+            if not await GuildPrefs.exists(guild.id):
+                return None
+
+        return await self.get_guild_prefs(guild)
+
+    async def __sync_overwrites(self, guild: discord.Guild) -> None:
+        if self.overwrites is None:
+            return
+
+        prefs = await self.__find_guild_prefs(guild)
+
+        if prefs is None:
+            log.info('Not syncing overwrites of guild %s without preferences', guild.id)
+            return
+
+        previous = prefs.overwrite_fingerprint
+        current = await self.overwrites.sync_guild(guild, rules_for(prefs), previous)
+
+        if current is not None and current != previous:
+            await prefs.save(overwrite_fingerprint=current)
+
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel) -> None:
+        if self.overwrites is None:
+            return
+
+        prefs = await self.__find_guild_prefs(channel.guild)
+
+        if prefs is not None:
+            await self.overwrites.sync_channel(channel, rules_for(prefs))
+
+    async def on_guild_channel_update(
+        self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel
+    ) -> None:
+        guild = after.guild
+
+        if (
+            self.overwrites is None
+            or before.overwrites == after.overwrites
+            # the edits made by syncing come back here
+            or self.overwrites.is_syncing(guild.id)
+        ):
+            return
+
+        prefs = await self.__find_guild_prefs(guild)
+
+        if prefs is None:
+            return
+
+        rules = rules_for(prefs)
+
+        if all(
+            before.overwrites_for(role) == after.overwrites_for(role)
+            for role, _ in rules
+        ):
+            return
+
+        # someone changed the mute or time out overwrites: keep their edit rather
+        # than reverting it, and have the next guild sync compare against it
+        await prefs.save(overwrite_fingerprint=fingerprint(guild, rules))
 
     async def on_guild_join(self, guild: discord.Guild) -> None:
         await self.__setup_guild(guild, joined=True)
@@ -291,4 +824,39 @@ class Bothanasius(
         log.info('Guild available: %s', guild.id)
 
     async def on_guild_unavailable(self, guild: discord.Guild) -> None:
+        self.role_hierarchy.invalidate(guild.id)
+
         log.info('Guild unavailable: %s', guild.id)
+
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        self.role_hierarchy.invalidate(guild.id)
+
+        self.punishments.forget(guild.id)
+        self.warning_counts.forget(guild.id)
+
+        if self.raid_detector is not None:
+            self.raid_detector.forget(guild.id)
+
+    # creating, deleting or moving any role can shift the bot's top role
+    async def on_guild_role_create(self, role: discord.Role) -> None:
+        self.role_hierarchy.invalidate(role.guild.id)
+
+    async def on_guild_role_delete(self, role: discord.Role) -> None:
+        self.role_hierarchy.invalidate(role.guild.id)
+
+    async def on_guild_role_update(
+        self, before: discord.Role, after: discord.Role
+    ) -> None:
+        self.role_hierarchy.invalidate(after.guild.id)
+
+    async def on_member_update(
+        self, before: discord.Member, after: discord.Member
+    ) -> None:
+        if self.user is not None and after.id == self.user.id:
+            self.role_hierarchy.invalidate(after.guild.id)
+
+
+class ShardedBothanasius(Bothanasius, commands.AutoShardedBot):
+    """
+    Runs a subset of shards in one process, see `bothanasius.cluster`
+    """
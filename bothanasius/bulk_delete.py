@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Set
+from typing_extensions import Final
+
+import asyncio
+import discord
+import logging
+
+from .metrics import Counter
+
+log = logging.getLogger(__name__)
+
+# the bulk delete endpoint takes 2-100 messages no older than 14 days
+BULK_DELETE_MAX: Final = 100
+BULK_DELETE_MAX_AGE: Final = timedelta(days=14) - timedelta(minutes=5)
+
+messages_deleted: Final = Counter(
+    'bothanasius_messages_deleted_total',
+    'Messages deleted through the deletion queue',
+    ('method',),
+)
+rest_calls_saved: Final = Counter(
+    'bothanasius_delete_rest_calls_saved_total',
+    'REST calls avoided by bulk deleting messages instead of one at a time',
+)
+
+
+class DeletionQueue(object):
+    """
+    Buffers message deletions per channel and flushes them with the bulk delete
+    endpoint after `delay` seconds or once a full batch has built up
+    """
+
+    loop: asyncio.AbstractEventLoop
+    delay: float
+
+    _pending: Dict[int, List[discord.Message]]
+    _timers: Dict[int, asyncio.TimerHandle]
+    _flushing: 'Set[asyncio.Task[None]]'
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, *, delay: float = 1.0) -> None:
+        self.loop = loop
+        self.delay = delay
+        self._pending = {}
+        self._timers = {}
+        self._flushing = set()
+
+    def delete(self, message: discord.Message) -> None:
+        channel_id = message.channel.id
+        pending = self._pending.setdefault(channel_id, [])
+        pending.append(message)
+
+        if len(pending) >= BULK_DELETE_MAX:
+            self.__schedule_flush(channel_id, 0)
+        elif channel_id not in self._timers:
+            self.__schedule_flush(channel_id, self.delay)
+
+    async def close(self) -> None:
+        for channel_id in list(self._pending):
+            self.__schedule_flush(channel_id, 0)
+
+        if self._flushing:
+            await asyncio.wait(list(self._flushing))
+
+    def __schedule_flush(self, channel_id: int, delay: float) -> None:
+        timer = self._timers.pop(channel_id, None)
+
+        if timer is not None:
+            timer.cancel()
+
+        if delay > 0:
+            self._timers[channel_id] = self.loop.call_later(
+                delay, self.__schedule_flush, channel_id, 0
+            )
+            return
+
+        messages = self._pending.pop(channel_id, [])
+
+        if messages:
+            task = self.loop.create_task(self.__flush(messages))
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+
+    async def __flush(self, messages: List[discord.Message]) -> None:
+        channel = messages[0].channel
+        cutoff = datetime.utcnow() - BULK_DELETE_MAX_AGE
+        bulk: List[discord.Message] = []
+        single: List[discord.Message] = []
+
+        for message in messages:
+            if isinstance(channel, discord.TextChannel) and message.created_at > cutoff:
+                bulk.append(message)
+            else:
+                single.append(message)
+
+        for start in range(0, len(bulk), BULK_DELETE_MAX):
+            batch = bulk[start : start + BULK_DELETE_MAX]
+
+            if len(batch) == 1:
+                single.extend(batch)
+                continue
+
+            try:
+                await channel.delete_messages(batch)
+            except discord.Forbidden:
+                # deleting them one at a time would be forbidden too
+                log.warning(
+                    'Missing permissions to delete %d messages in %s',
+                    len(messages),
+                    channel,
+                )
+                return
+            except discord.HTTPException as e:
+                log.debug('Bulk delete in %s failed: %s', channel, e)
+                single.extend(batch)
+            else:
+                messages_deleted.inc(len(batch), method='bulk')
+                rest_calls_saved.inc(len(batch) - 1)
+
+        for message in single:
+            try:
+                await message.delete()
+            except discord.NotFound:
+                pass
+            except discord.Forbidden:
+                log.warning(
+                    'Missing permissions to delete %d messages in %s',
+                    len(messages),
+                    channel,
+                )
+                return
+            except discord.HTTPException:
+                log.exception('Failed to delete message %s', message.id)
+            else:
+                messages_deleted.inc(method='single')
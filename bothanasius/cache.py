@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+    Generic,
+    Optional,
+    TypeVar,
+)
+from typing_extensions import Final
+
+from .db.invalidation import bus
+from .metrics import Counter
+
+V = TypeVar('V')
+
+cache_requests: Final = Counter(
+    'bothanasius_cache_requests_total',
+    'Guild cache lookups',
+    ('cache', 'result'),
+)
+
+
+# caches that can be written to and restored from a snapshot, by table
+snapshot_caches: Final[Dict[str, GuildCache[Any]]] = {}
+
+
+class GuildCache(Generic[V]):
+    """
+    Per-guild values loaded on demand and dropped whenever rows for the guild
+    change in `table`
+    """
+
+    table: str
+    encode: Optional[Callable[[V], Any]]
+    decode: Optional[Callable[[Any], V]]
+    _entries: Dict[int, V]
+    # bumped on every invalidation so that a load racing with one is not stored
+    _generation: int
+
+    def __init__(
+        self,
+        table: str,
+        *,
+        encode: Optional[Callable[[V], Any]] = None,
+        decode: Optional[Callable[[Any], V]] = None,
+    ) -> None:
+        self.table = table
+        self.encode = encode
+        self.decode = decode
+        self._entries = {}
+        self._generation = 0
+
+        bus.subscribe(table, self.invalidate)
+
+        if encode is not None and decode is not None:
+            snapshot_caches[table] = self
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        bus.unsubscribe(self.table, self.invalidate)
+        self._entries.clear()
+
+        if snapshot_caches.get(self.table) is self:
+            del snapshot_caches[self.table]
+
+    def entries(self) -> Dict[int, V]:
+        return dict(self._entries)
+
+    def adopt(self, entries: Dict[int, V]) -> None:
+        """
+        Takes over entries from another cache for the same table, e.g. the one
+        held by the previous instance of a reloaded cog
+        """
+        for guild_id, value in entries.items():
+            self._entries.setdefault(guild_id, value)
+
+    def export(self) -> Dict[str, Any]:
+        assert self.encode is not None
+
+        return {
+            str(guild_id): self.encode(value)
+            for guild_id, value in self._entries.items()
+        }
+
+    def restore(self, data: Dict[str, Any], *, skip: Collection[int] = ()) -> int:
+        """
+        Fills the cache from `export()` output, except for the guilds in `skip`
+        """
+        assert self.decode is not None
+
+        count = 0
+
+        for key, value in data.items():
+            guild_id = int(key)
+
+            if guild_id not in skip and guild_id not in self._entries:
+                self._entries[guild_id] = self.decode(value)
+                count += 1
+
+        return count
+
+    def peek(self, guild_id: int) -> Optional[V]:
+        return self._entries.get(guild_id)
+
+    async def get(self, guild_id: int, load: Callable[[], Awaitable[V]]) -> V:
+        try:
+            value = self._entries[guild_id]
+        except KeyError:
+            pass
+        else:
+            cache_requests.inc(cache=self.table, result='hit')
+            return value
+
+        cache_requests.inc(cache=self.table, result='miss')
+
+        generation = self._generation
+        value = await load()
+
+        if generation == self._generation:
+            self._entries[guild_id] = value
+
+        return value
+
+    def invalidate(self, guild_id: Optional[int]) -> None:
+        self._generation += 1
+
+        if guild_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(guild_id, None)
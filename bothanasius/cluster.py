@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+from multiprocessing.context import SpawnProcess
+from pathlib import Path
+from typing import Any, List, Optional, Sequence
+
+import argparse
+import asyncio
+import attr
+import logging
+import multiprocessing
+import signal
+import time
+import uvloop
+
+from botus_receptus import Config
+from botus_receptus.config import load
+
+from .config import get_section
+
+log = logging.getLogger(__name__)
+
+# Discord allows one IDENTIFY every 5 seconds per bot
+IDENTIFY_INTERVAL = 5.0
+# a worker that stays up this long has its restart backoff reset
+STABLE_AFTER = 60.0
+MAX_BACKOFF = 300.0
+
+
+def shard_ranges(shard_count: int, workers: int) -> List[List[int]]:
+    """
+    Split shards into `workers` contiguous ranges that differ in size by at most one
+    """
+    workers = max(1, min(workers, shard_count))
+    size, extra = divmod(shard_count, workers)
+    ranges: List[List[int]] = []
+    start = 0
+
+    for index in range(workers):
+        end = start + size + (1 if index < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+
+    return ranges
+
+
+def _setup_logging(config: Config, name: str) -> None:
+    logging_config = get_section(config, 'logging')
+    log_file: Optional[str] = logging_config.get('log_file')
+
+    handler: logging.Handler
+    if log_file is not None:
+        path = Path(log_file)
+        handler = logging.FileHandler(
+            path.with_name(f'{path.stem}-{name}{path.suffix}'), encoding='utf-8'
+        )
+    else:
+        handler = logging.StreamHandler()
+
+    handler.setFormatter(
+        logging.Formatter(
+            f'%(asctime)s [{name}] %(levelname)s %(name)s: %(message)s',
+            '%Y-%m-%d %H:%M:%S',
+        )
+    )
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(handler)
+
+    for logger_name, level in (logging_config.get('loggers') or {}).items():
+        if isinstance(level, str):
+            logger = logging.getLogger(None if logger_name == 'root' else logger_name)
+            logger.setLevel(level.upper())
+
+
+def run_worker(
+    config_path: str,
+    index: int,
+    shard_ids: Sequence[int],
+    shard_count: int,
+    delay: float,
+) -> None:
+    from .bothanasius import ShardedBothanasius
+
+    name = f'shards {shard_ids[0]}-{shard_ids[-1]}'
+    config = load(config_path)
+    _setup_logging(config, name)
+
+    metrics_config = get_section(config, 'metrics')
+    if 'port' in metrics_config:
+        metrics_config['port'] += index
+
+    if delay > 0:
+        log.info('Waiting %.0fs before identifying', delay)
+        time.sleep(delay)
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    bot = ShardedBothanasius(config, shard_ids=list(shard_ids), shard_count=shard_count)
+    bot.run(config['discord_api_key'])
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Worker(object):
+    index: int
+    shard_ids: List[int]
+    process: Optional[SpawnProcess] = None
+    started: float = 0.0
+    backoff: float = 1.0
+    restart_at: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return f'shards {self.shard_ids[0]}-{self.shard_ids[-1]}'
+
+
+class Cluster(object):
+    """
+    Runs one bot process per contiguous shard range and restarts any that exit
+    """
+
+    config_path: str
+    shard_count: int
+    workers: List[Worker]
+
+    _context: Any
+    _stopping: bool
+
+    def __init__(self, config_path: str, shard_count: int, workers: int) -> None:
+        self.config_path = config_path
+        self.shard_count = shard_count
+        self.workers = [
+            Worker(index, shard_ids)
+            for index, shard_ids in enumerate(shard_ranges(shard_count, workers))
+        ]
+        self._context = multiprocessing.get_context('spawn')
+        self._stopping = False
+
+    def _spawn(self, worker: Worker, delay: float) -> None:
+        process = self._context.Process(
+            target=run_worker,
+            name=f'bothanasius {worker.name}',
+            args=(
+                self.config_path,
+                worker.index,
+                worker.shard_ids,
+                self.shard_count,
+                delay,
+            ),
+        )
+        process.start()
+
+        worker.process = process
+        worker.started = time.monotonic()
+        worker.restart_at = None
+
+        log.info('Started %s (pid %s)', worker.name, process.pid)
+
+    def _check(self, worker: Worker) -> None:
+        now = time.monotonic()
+
+        if worker.restart_at is not None:
+            if now >= worker.restart_at:
+                # a single worker restarting identifies its shards one at a time
+                self._spawn(worker, 0)
+            return
+
+        if worker.process is None or worker.process.is_alive():
+            return
+
+        if now - worker.started >= STABLE_AFTER:
+            worker.backoff = 1.0
+
+        log.warning(
+            '%s exited with code %s, restarting in %.0fs',
+            worker.name,
+            worker.process.exitcode,
+            worker.backoff,
+        )
+
+        worker.restart_at = now + worker.backoff
+        worker.backoff = min(worker.backoff * 2, MAX_BACKOFF)
+
+    def stop(self, *args: Any) -> None:
+        self._stopping = True
+
+    def run(self) -> None:
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        for worker in self.workers:
+            # stagger identifies across processes
+            self._spawn(worker, worker.shard_ids[0] * IDENTIFY_INTERVAL)
+
+        while not self._stopping:
+            for worker in self.workers:
+                self._check(worker)
+
+            time.sleep(1)
+
+        log.info('Stopping workers')
+
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog='bothanasius-cluster',
+        description='Run Bothanasius as several processes, each owning a '
+        'contiguous range of shards',
+    )
+    parser.add_argument('-c', '--config', default='./config.toml')
+    parser.add_argument('--shards', type=int, help='total number of shards')
+    parser.add_argument('--workers', type=int, help='number of processes')
+    args = parser.parse_args()
+
+    cluster_config = get_section(load(args.config), 'cluster')
+    shard_count: int = args.shards or cluster_config.get('shard_count', 1)
+    workers: int = args.workers or cluster_config.get(
+        'workers', multiprocessing.cpu_count()
+    )
+
+    logging.basicConfig(
+        level=logging.INFO, format='%(asctime)s [cluster] %(levelname)s %(message)s'
+    )
+
+    Cluster(args.config, shard_count, workers).run()
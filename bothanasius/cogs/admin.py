@@ -12,6 +12,7 @@ from botus_receptus import formatting
 from ..bothanasius import Bothanasius
 from ..context import Context, GuildContext
 from ..db.admin import InviteArgumentParser
+from ..escalation import ESCALATION_ACTIONS, EscalationStep, policy_steps
 from ..checks import check_admin_only
 
 log = logging.getLogger(__name__)
@@ -35,13 +36,14 @@ class Administration(commands.Cog[Context]):
     @commands.Cog.listener()
     async def on_command_completion(self, ctx: Context) -> None:
         if not ctx.has_error:
-            await ctx.message.delete()
+            self.bot.deletions.delete(ctx.message)
 
     @commands.group()
     async def settings(self, ctx: GuildContext) -> None:
         if ctx.invoked_subcommand is None:
             prefs = await ctx.guild_prefs
             mute_role = prefs.guild_mute_role
+            warn_steps = policy_steps(prefs.warn_policy)
 
             await ctx.send_embed(
                 '',
@@ -77,13 +79,19 @@ class Administration(commands.Cog[Context]):
                         else '\U0001f6ab',
                         'inline': True,
                     },
+                    {
+                        'name': 'Warning Policy',
+                        'value': '\n'.join(step.describe() for step in warn_steps)
+                        or '\U0001f6ab',
+                        'inline': True,
+                    },
                 ],
             )
 
     @settings.command()
     async def prefix(self, ctx: GuildContext, prefix: str) -> None:
         prefs = await ctx.guild_prefs
-        await prefs.update(prefix=prefix).apply()
+        await prefs.save(prefix=prefix)
         self.bot.prefix_map[ctx.guild.id] = prefix
         await ctx.send_response(f'Prefix set to {formatting.inline_code(prefix)}')
 
@@ -122,7 +130,7 @@ class Administration(commands.Cog[Context]):
         parsed = await InviteArgumentParser.parse(ctx, prefs.invite_prefs, options)
 
         if parsed is not None:
-            await prefs.update(**parsed).apply()
+            await prefs.save(**parsed)
 
     @settings.command()
     async def muterole(
@@ -160,6 +168,36 @@ class Administration(commands.Cog[Context]):
         await prefs.remove_mod_role(role)
         await ctx.send_response(f'Deleted {role.name} from mod roles')
 
+    @settings.command()
+    async def warnstep(
+        self,
+        ctx: GuildContext,
+        warnings: int,
+        action: str,
+        minutes: Optional[int] = None,
+    ) -> None:
+        """Punish members when they reach a number of active warnings
+
+        `action` is one of `mute`, `timeout` or `ban`. Leave out `minutes` for a
+        punishment that doesn't end by itself.
+        """
+        action = action.lower()
+
+        if action not in ESCALATION_ACTIONS or warnings < 1:
+            await ctx.send_help(ctx.command)
+            return
+
+        prefs = await ctx.guild_prefs
+        await prefs.set_warn_step(warnings, action, minutes)
+        step = EscalationStep(warnings, action, minutes)
+        await ctx.send_response(f'Added to the warning policy: {step.describe()}')
+
+    @settings.command()
+    async def delwarnstep(self, ctx: GuildContext, warnings: int) -> None:
+        prefs = await ctx.guild_prefs
+        await prefs.remove_warn_step(warnings)
+        await ctx.send_response(f'Removed {warnings} warnings from the warning policy')
+
 
 def setup(bot: Bothanasius) -> None:
     bot.add_cog(Administration(bot))
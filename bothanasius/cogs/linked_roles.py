@@ -1,36 +1,76 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Dict, List
 
 import discord
+import logging
 
 from discord.ext import commands
 
 from ..bothanasius import Bothanasius
+from ..cache import GuildCache
 from ..checks import check_guild_only, admin_only
 from ..context import Context, GuildContext
-from ..db.linked_roles import LinkedRole
 from ..db import Ltree
+from ..db.linked_roles import LinkedRole
+from ..hierarchy import CannotManageRole
+from ..stateful import StatefulCog
+
+log = logging.getLogger(__name__)
+
+
+def _encode(linked_roles: List[LinkedRole]) -> List[Dict[str, Any]]:
+    return [
+        {
+            'guild_id': linked_role.guild_id,
+            'role_id': linked_role.role_id,
+            'path': str(linked_role.path),
+        }
+        for linked_role in linked_roles
+    ]
+
 
+def _decode(data: List[Dict[str, Any]]) -> List[LinkedRole]:
+    return [
+        LinkedRole(
+            guild_id=values['guild_id'],
+            role_id=values['role_id'],
+            path=Ltree(values['path']),
+        )
+        for values in data
+    ]
+
+
+class LinkedRoles(commands.Cog[Context], StatefulCog):
+    linked_roles: GuildCache[List[LinkedRole]]
 
-class LinkedRoles(commands.Cog[Context]):
     def __init__(self, bot: Bothanasius) -> None:
         self.bot = bot
+        self.linked_roles = GuildCache(
+            LinkedRole.__tablename__, encode=_encode, decode=_decode
+        )
+
+    def cog_unload(self) -> None:
+        self.linked_roles.close()
+
+    def export_state(self) -> Dict[str, Any]:
+        return {'linked_roles': self.linked_roles.entries()}
+
+    def import_state(self, state: Dict[str, Any]) -> None:
+        self.linked_roles.adopt(state['linked_roles'])
 
     async def cog_check(self, ctx: Context) -> bool:
         return check_guild_only(ctx)
 
     @commands.Cog.listener()
     async def on_guild_role_delete(self, role: discord.Role) -> None:
-        await LinkedRole.delete.where(LinkedRole.guild_id == role.guild.id).where(
-            LinkedRole.role_id == role.id
-        ).gino.status()
+        await LinkedRole.unlink(role.guild, role)
 
     @commands.Cog.listener()
     async def on_member_update(
         self, before: discord.Member, after: discord.Member
     ) -> None:
-        print('on_member_update')
+        log.debug('Member %s updated in guild %s', after.id, after.guild.id)
         if before.roles == after.roles:
             return
 
@@ -39,14 +79,17 @@ class LinkedRoles(commands.Cog[Context]):
 
         new_roles = set(after.roles)
 
-        added_role_ids = [
-            str(f'*.{role.id}') for role in after_role_set - before_role_set
-        ]
+        added_role_ids = {str(role.id) for role in after_role_set - before_role_set}
         # removed_role_ids = [str(role.id) for role in before_role_set - after_role_set]
 
-        linked_roles: List[LinkedRole] = await LinkedRole.query.where(
-            LinkedRole.guild_id == after.guild.id
-        ).where(LinkedRole.path.lquery(added_role_ids)).gino.all()
+        guild_id = after.guild.id
+        linked_roles = [
+            linked_role
+            for linked_role in await self.linked_roles.get(
+                guild_id, lambda: LinkedRole.for_guild(guild_id)
+            )
+            if linked_role.path.path[-1] in added_role_ids
+        ]
 
         for linked_role in linked_roles:
             path = linked_role.path.path[0:-1]
@@ -98,6 +141,14 @@ class LinkedRoles(commands.Cog[Context]):
             #         new_roles.remove(parent_role)
 
         if new_roles != after_role_set:
+            try:
+                self.bot.role_hierarchy.check(new_roles - after_role_set)
+            except CannotManageRole as e:
+                log.debug(
+                    'Not linking roles for %s in guild %s: %s', after.id, guild_id, e
+                )
+                return
+
             await after.edit(reason='Linked roles', roles=list(new_roles))
 
     @admin_only
@@ -105,29 +156,13 @@ class LinkedRoles(commands.Cog[Context]):
     async def linkrole(
         self, ctx: GuildContext, role: discord.Role, parent: discord.Role
     ) -> None:
-        parent_record = await LinkedRole.get(
-            {LinkedRole.guild_id.name: ctx.guild.id, LinkedRole.role_id.name: parent.id}
-        )
-
-        if parent_record is None:
-            parent_record = await LinkedRole.create(
-                guild_id=ctx.guild.id, role_id=parent.id, path=Ltree(str(parent.id))
-            )
-
-        await LinkedRole.create(
-            guild_id=ctx.guild.id,
-            role_id=role.id,
-            path=parent_record.path + str(role.id),
-        )
-
+        await LinkedRole.link(ctx.guild, role, parent)
         await ctx.send_response('Roles linked')
 
     @admin_only
     @commands.command()
     async def unlinkrole(self, ctx: GuildContext, role: discord.Role) -> None:
-        await LinkedRole.delete.where(LinkedRole.guild_id == ctx.guild.id).where(
-            LinkedRole.role_id == role.id
-        ).gino.status()
+        await LinkedRole.unlink(ctx.guild, role)
         await ctx.send_response('Role unlinked')
 
 
@@ -1,27 +1,135 @@
 from __future__ import annotations
 
+from typing import Optional
+
+import asyncio
+import discord
+import io
 import logging
 
 from discord.ext import commands
+from botus_receptus.formatting import EmbedPaginator, inline_code
 
 from ..context import Context
 from ..bothanasius import Bothanasius
+from ..profiler import SamplingProfiler, allocation_diff
+from ..stateful import reload_extension
 
 log = logging.getLogger(__name__)
 
+MAX_PROFILE_SECONDS = 300
+
+
+def _format_size(size: int) -> str:
+    value = float(size)
+
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(value) < 1024:
+            return f'{value:+.0f} {unit}' if unit == 'B' else f'{value:+.1f} {unit}'
+        value /= 1024
+
+    return f'{value:+.1f} GiB'
+
 
 class Meta(commands.Cog[Context]):
+    _profiling: asyncio.Lock
+    _tracing: asyncio.Lock
+
     def __init__(self, bot: Bothanasius) -> None:
         self.bot = bot
+        self._profiling = asyncio.Lock(loop=bot.loop)
+        self._tracing = asyncio.Lock(loop=bot.loop)
 
     @commands.is_owner()
     @commands.command(name='reload', hidden=True)
     async def _reload(self, ctx: Context, module: str) -> None:
         try:
-            self.bot.reload_extension(f'bothanasius.cogs.{module}')
+            adopted = reload_extension(self.bot, f'bothanasius.cogs.{module}')
         except commands.ExtensionError as e:
             await ctx.send(f'{e.__class__.__name__}: {e}')
             log.exception('Failed to load extension %s.', module)
+        else:
+            if adopted:
+                log.info('Handed over state of %s', ', '.join(adopted))
+
+    @commands.is_owner()
+    @commands.command(name='profile', hidden=True)
+    async def _profile(
+        self, ctx: Context, seconds: float = 10, count: int = 25
+    ) -> None:
+        """Sample the event loop thread for a number of seconds
+
+        Replies with the hottest functions (own and total share of samples) and
+        a folded stack file that can be loaded into flamegraph.pl or speedscope.
+        """
+        if self._profiling.locked():
+            await ctx.send_error('A profile is already running')
+            return
+
+        seconds = min(max(seconds, 1), MAX_PROFILE_SECONDS)
+
+        async with self._profiling:
+            await ctx.send_response(f'Profiling for {seconds:g} seconds')
+            profile = await SamplingProfiler.for_current_thread().run(seconds)
+
+        if profile.samples == 0:
+            await ctx.send_error('No samples were collected')
+            return
+
+        paginator = EmbedPaginator()
+        paginator.add_line(f'{inline_code("  own  total")} function')
+
+        for stats in profile.top(count):
+            own = stats.own * 100 / profile.samples
+            total = stats.total * 100 / profile.samples
+            paginator.add_line(
+                f'{inline_code(f"{own:5.1f}% {total:5.1f}%")} {stats.name}'
+            )
+
+        title = f'Profile: {profile.samples} samples over {profile.duration:.1f}s'
+        pages = list(paginator)
+
+        for page in pages[:-1]:
+            await ctx.send_response(page, title=title)
+
+        await ctx.send_response(
+            pages[-1],
+            title=title,
+            file=discord.File(
+                io.BytesIO(profile.collapsed().encode()), filename='profile.folded'
+            ),
+        )
+
+    @commands.is_owner()
+    @commands.command(name='memdiff', hidden=True)
+    async def _memdiff(
+        self, ctx: Context, seconds: float = 30, count: int = 15
+    ) -> None:
+        """Show the biggest allocation sites over a number of seconds"""
+        if self._tracing.locked():
+            await ctx.send_error('Allocations are already being traced')
+            return
+
+        seconds = min(max(seconds, 1), MAX_PROFILE_SECONDS)
+
+        async with self._tracing:
+            await ctx.send_response(f'Tracing allocations for {seconds:g} seconds')
+            sites = await allocation_diff(seconds, count=count)
+
+        paginator = EmbedPaginator()
+
+        for site in sites:
+            paginator.add_line(
+                f'{inline_code(_format_size(site.size_diff))} '
+                f'({site.count_diff:+d} blocks) {inline_code(site.location)}'
+            )
+
+        page: Optional[str] = None
+        for page in paginator:
+            await ctx.send_response(page, title='Allocation growth')
+
+        if page is None:
+            await ctx.send_response('No allocations recorded')
 
 
 def setup(bot: Bothanasius) -> None:
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from typing import Optional, Union
+from typing import AbstractSet, Dict, List, Optional, Tuple, Union
 
+import asyncio
 import discord
 import logging
 import pendulum
@@ -10,26 +11,68 @@ from discord.ext import commands
 from botus_receptus.formatting import EmbedPaginator, underline, bold, strikethrough
 
 from ..bothanasius import Bothanasius, DelayedAction
-from ..db.admin import GuildPrefs, InviteArgumentParser
+from ..db.admin import InviteArgumentParser
+from ..db.lockdown import LockedChannel
 from ..db.mod import Warning
 from ..context import Context, GuildContext
+from ..hierarchy import CannotManageRole
+from ..overwrites import OverwriteChange
+from ..ratelimit import TokenBucket
+from ..escalation import EscalationStep, crossed, policy_steps
+from ..punishments import MUTE, TIME_OUT
+from ..purge import PurgeArgumentParser, PurgeProgress, purge_history
 from ..checks import check_mod_only
 
 log = logging.getLogger(__name__)
 
 
 class Moderation(commands.Cog[Context]):
+    _raiders: 'asyncio.Queue[discord.Member]'
+    _raid_bucket: Optional[TokenBucket]
+    _raid_task: Optional['asyncio.Task[None]']
+
     def __init__(self, bot: Bothanasius) -> None:
         self.bot = bot
+        self._raiders = asyncio.Queue(loop=bot.loop)
+        self._raid_bucket = None
+        self._raid_task = None
+
+        if bot.raid_detector is not None:
+            rate = bot.raid_detector.rate
+            self._raid_bucket = TokenBucket(rate, rate)
+            self._raid_task = bot.loop.create_task(self.__time_out_raiders())
+
+    def cog_unload(self) -> None:
+        if self._raid_task is not None:
+            self._raid_task.cancel()
 
     async def cog_check(self, ctx: Context) -> bool:
         return await check_mod_only(ctx)
 
-    @commands.command()
-    async def mute(
-        self, ctx: GuildContext, member: discord.Member, minutes: Optional[int] = None
-    ) -> None:
-        role = (await ctx.guild_prefs).guild_mute_role
+    def __describe_moderator(self, action: DelayedAction) -> str:
+        mod_id: int = action.kwargs['moderator_id']
+        moderator: Optional[str] = action.kwargs.get('moderator')
+
+        # actions created before the name was stored only have the ID
+        if moderator is None:
+            moderator = self.bot.user_cache.describe(mod_id)
+
+        if moderator is None:
+            return f'Moderator ID {mod_id}'
+
+        return f'{moderator} (ID: {mod_id})'
+
+    async def __mute(
+        self,
+        guild: discord.Guild,
+        member: discord.Member,
+        channel: discord.TextChannel,
+        moderator: Union[discord.User, discord.Member],
+        minutes: Optional[int],
+        reason: str,
+    ) -> bool:
+        prefs = await self.bot.get_guild_prefs(guild)
+        role = prefs.guild_mute_role
 
         if role is not None:
             if minutes is not None:
@@ -37,33 +80,106 @@ class Moderation(commands.Cog[Context]):
                 end_time = now.add(minutes=minutes)
 
             try:
-                await member.add_roles(role, reason=f'Muted by {ctx.message.author}')
-            except discord.Forbidden:
+                self.bot.role_hierarchy.check((role,))
+                await member.add_roles(role, reason=reason)
+            except (discord.Forbidden, CannotManageRole):
                 log.error(
-                    f'Could not mute {member.mention} in {ctx.guild.name} '
-                    f'({ctx.guild.id})'
+                    f'Could not mute {member.mention} in {guild.name} ({guild.id})'
                 )
-                await ctx.send_error(
-                    f'Could not mute {member.mention}. Please make sure the '
-                    '`Bothanasius` role is higher than the `{role.name}` '
-                    'role.',
-                    title='Permissions incorrect',
+                await channel.send(
+                    embed=discord.Embed(
+                        title='Permissions incorrect',
+                        color=discord.Color.red(),
+                        description=f'Could not mute {member.mention}. Please make '
+                        'sure the `Bothanasius` role is higher than the '
+                        f'`{role.name}` role.',
+                    )
                 )
+
+                return True
             else:
-                await ctx.send_response(f'{member.mention} has been muted')
+                self.bot.punishments.add(guild.id, member.id, MUTE)
+
+                await channel.send(
+                    embed=discord.Embed(
+                        color=discord.Color.green(),
+                        description=f'{member.mention} has been muted',
+                    )
+                )
 
                 if minutes is None:
-                    await self.bot.remove_action('unmute', ctx.guild.id, member.id)
+                    await self.bot.remove_action('unmute', guild.id, member.id)
                 else:
                     await self.bot.create_or_update_action(
                         end_time,
                         'unmute',
-                        ctx.guild.id,
+                        guild.id,
                         member.id,
-                        moderator_id=ctx.author.id,
-                        channel_id=ctx.channel.id,
+                        moderator_id=moderator.id,
+                        moderator=str(moderator),
+                        channel_id=channel.id,
                     )
 
+        return False
+
+    @commands.command()
+    async def mute(
+        self, ctx: GuildContext, member: discord.Member, minutes: Optional[int] = None
+    ) -> None:
+        ctx.has_error = await self.__mute(
+            ctx.guild,
+            member,
+            ctx.channel,
+            ctx.author,
+            minutes,
+            f'Muted by {ctx.author}',
+        )
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message) -> None:
+        detector = self.bot.flood_detector
+
+        if (
+            detector is None
+            or message.guild is None
+            or message.author.bot
+            or not isinstance(message.author, discord.Member)
+            or not isinstance(message.channel, discord.TextChannel)
+            # moderators can always clean up after themselves
+            or message.channel.permissions_for(message.author).manage_messages
+        ):
+            return
+
+        reason = detector.check(message)
+
+        if reason is None:
+            return
+
+        guild = message.guild
+        member = message.author
+        prefs = await self.bot.get_guild_prefs(guild)
+        role = prefs.guild_mute_role
+        mod_ids = set((prefs.admin_roles or []) + (prefs.mod_roles or []))
+
+        if (
+            role is None
+            or role in member.roles
+            or guild.me is None
+            or any(member_role.id in mod_ids for member_role in member.roles)
+        ):
+            return
+
+        log.info('Muting %s in guild %s: %s', member.id, guild.id, reason)
+
+        await self.__mute(
+            guild,
+            member,
+            message.channel,
+            guild.me,
+            detector.mute_minutes,
+            f'Automatic mute: {reason}',
+        )
+
     async def __unmute(
         self,
         guild: discord.Guild,
@@ -71,15 +187,16 @@ class Moderation(commands.Cog[Context]):
         channel: Optional[discord.TextChannel],
         reason: str,
     ) -> bool:
-        prefs = await GuildPrefs.for_guild(guild)
+        prefs = await self.bot.get_guild_prefs(guild)
         role = prefs.guild_mute_role
 
         if role is not None:
             await self.bot.remove_action('unmute', guild.id, member.id)
 
             try:
+                self.bot.role_hierarchy.check((role,))
                 await member.remove_roles(role, reason=reason)
-            except discord.Forbidden:
+            except (discord.Forbidden, CannotManageRole):
                 log.error(
                     f'Could not unmute {member.mention} in {guild.name} '
                     f'({guild.id})'
@@ -98,6 +215,8 @@ class Moderation(commands.Cog[Context]):
 
                 return True
             else:
+                self.bot.punishments.remove(guild.id, member.id, MUTE)
+
                 if channel:
                     await channel.send(
                         embed=discord.Embed(
@@ -117,27 +236,17 @@ class Moderation(commands.Cog[Context]):
     @commands.Cog.listener()
     async def on_unmute_action_complete(self, action: DelayedAction) -> None:
         guild_id, member_id = action.args  # type: int, int
-        mod_id: int = action.kwargs['moderator_id']
         channel_id: int = action.kwargs['channel_id']
 
+        # the punishment is over whether or not the member is still around
+        self.bot.punishments.remove(guild_id, member_id, MUTE)
+
         guild, member = self.bot.get_guild_member(guild_id, member_id)
 
         if guild is None or member is None:
             return
 
-        moderator: Optional[Union[discord.User, discord.Member]] = guild.get_member(
-            mod_id
-        )
-
-        if moderator is None:
-            try:
-                moderator = await self.bot.fetch_user(mod_id)
-            except Exception:
-                moderator_str = f'Moderator ID {mod_id}'
-            else:
-                moderator_str = f'{moderator} (ID: {mod_id})'
-        else:
-            moderator_str = f'{moderator} (ID: {mod_id})'
+        moderator_str = self.__describe_moderator(action)
 
         channel = self.bot.get_channel(channel_id) or guild.system_channel
 
@@ -155,15 +264,16 @@ class Moderation(commands.Cog[Context]):
         channel: Optional[discord.TextChannel],
         reason: str,
     ) -> bool:
-        prefs = await GuildPrefs.for_guild(guild)
+        prefs = await self.bot.get_guild_prefs(guild)
         role = prefs.guild_time_out_role
 
         if role is not None:
             await self.bot.remove_action('time_in', guild.id, member.id)
 
             try:
+                self.bot.role_hierarchy.check((role,))
                 await member.remove_roles(role, reason=reason)
-            except discord.Forbidden:
+            except (discord.Forbidden, CannotManageRole):
                 log.error(
                     f'Could not time in {member.mention} in {guild.name} '
                     f'({guild.id})'
@@ -182,6 +292,8 @@ class Moderation(commands.Cog[Context]):
 
                 return True
             else:
+                self.bot.punishments.remove(guild.id, member.id, TIME_OUT)
+
                 if channel:
                     await channel.send(
                         embed=discord.Embed(
@@ -192,16 +304,17 @@ class Moderation(commands.Cog[Context]):
 
         return False
 
-    @commands.command()
-    async def timeout(
+    async def __timeout(
         self,
-        ctx: GuildContext,
+        guild: discord.Guild,
         member: discord.Member,
-        minutes: Optional[int] = None,
-        *,
-        reason: Optional[str] = None,
-    ) -> None:
-        role = (await ctx.guild_prefs).guild_time_out_role
+        channel: discord.TextChannel,
+        moderator: Union[discord.User, discord.Member],
+        minutes: Optional[int],
+        reason: str,
+    ) -> bool:
+        prefs = await self.bot.get_guild_prefs(guild)
+        role = prefs.guild_time_out_role
 
         if role is not None:
             if minutes is not None:
@@ -209,33 +322,223 @@ class Moderation(commands.Cog[Context]):
                 end_time = now.add(minutes=minutes)
 
             try:
-                await member.add_roles(
-                    role, reason=f'Timed out by {ctx.message.author}'
-                )
-            except discord.Forbidden:
+                self.bot.role_hierarchy.check((role,))
+                await member.add_roles(role, reason=reason)
+            except (discord.Forbidden, CannotManageRole):
                 log.error(
-                    f'Could not time out {member.mention} in {ctx.guild.name} '
-                    f'({ctx.guild.id})'
+                    f'Could not time out {member.mention} in {guild.name} '
+                    f'({guild.id})'
                 )
-                await ctx.send_error(
-                    f'Could not time out {member.mention}. Please make sure the '
-                    '`Bothanasius` role is higher than the `{role.name}` '
-                    'role.',
-                    title='Permissions incorrect',
+                await channel.send(
+                    embed=discord.Embed(
+                        title='Permissions incorrect',
+                        color=discord.Color.red(),
+                        description=f'Could not time out {member.mention}. Please '
+                        'make sure the `Bothanasius` role is higher than the '
+                        f'`{role.name}` role.',
+                    )
                 )
+
+                return True
             else:
+                self.bot.punishments.add(guild.id, member.id, TIME_OUT)
+
                 if minutes is None:
-                    await self.bot.remove_action('time_in', ctx.guild.id, member.id)
+                    await self.bot.remove_action('time_in', guild.id, member.id)
                 else:
                     await self.bot.create_or_update_action(
                         end_time,
                         'time_in',
-                        ctx.guild.id,
+                        guild.id,
                         member.id,
-                        moderator_id=ctx.author.id,
-                        channel_id=ctx.channel.id,
+                        moderator_id=moderator.id,
+                        moderator=str(moderator),
+                        channel_id=channel.id,
                     )
 
+        return False
+
+    @commands.command()
+    async def timeout(
+        self,
+        ctx: GuildContext,
+        member: discord.Member,
+        minutes: Optional[int] = None,
+        *,
+        reason: Optional[str] = None,
+    ) -> None:
+        ctx.has_error = await self.__timeout(
+            ctx.guild,
+            member,
+            ctx.channel,
+            ctx.author,
+            minutes,
+            f'Timed out by {ctx.message.author}',
+        )
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member) -> None:
+        if member.bot:
+            return
+
+        detector = self.bot.raid_detector
+
+        # record the join before any requests so they don't skew the join rate
+        if detector is not None:
+            for raider in detector.record(member):
+                self._raiders.put_nowait(raider)
+
+        punishments = self.bot.punishments.get(member.guild.id, member.id)
+
+        if punishments:
+            await self.__punish_again(member, punishments)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member) -> None:
+        guild = member.guild
+        prefs = await self.bot.get_guild_prefs(guild)
+
+        # mutes and time outs without an end have no action to load them from,
+        # and ones lifted by hand must not be applied again
+        for punishment, role in (
+            (MUTE, prefs.guild_mute_role),
+            (TIME_OUT, prefs.guild_time_out_role),
+        ):
+            if role is None:
+                continue
+
+            if role in member.roles:
+                self.bot.punishments.add(guild.id, member.id, punishment)
+            else:
+                self.bot.punishments.remove(guild.id, member.id, punishment)
+
+    @commands.Cog.listener()
+    async def on_member_update(
+        self, before: discord.Member, after: discord.Member
+    ) -> None:
+        if before.roles == after.roles:
+            return
+
+        guild = after.guild
+        prefs = await self.bot.get_guild_prefs(guild)
+
+        # the mute or time out role was taken off in Discord rather than with
+        # unmute or timein
+        for punishment, role in (
+            (MUTE, prefs.guild_mute_role),
+            (TIME_OUT, prefs.guild_time_out_role),
+        ):
+            if role is not None and role in before.roles and role not in after.roles:
+                self.bot.punishments.remove(guild.id, after.id, punishment)
+
+    async def __punish_again(
+        self, member: discord.Member, punishments: AbstractSet[str]
+    ) -> None:
+        guild = member.guild
+        prefs = await self.bot.get_guild_prefs(guild)
+        roles = [
+            role
+            for punishment, role in (
+                (MUTE, prefs.guild_mute_role),
+                (TIME_OUT, prefs.guild_time_out_role),
+            )
+            if punishment in punishments and role is not None
+        ]
+
+        if not roles:
+            return
+
+        try:
+            self.bot.role_hierarchy.check(roles)
+            await member.add_roles(*roles, reason='Rejoined while punished')
+        except (discord.HTTPException, CannotManageRole) as e:
+            log.warning(
+                'Could not punish %s again in guild %s: %s', member.id, guild.id, e
+            )
+        else:
+            log.info('Punished %s again on rejoining guild %s', member.id, guild.id)
+
+    async def __time_out_raiders(self) -> None:
+        detector = self.bot.raid_detector
+        assert detector is not None
+
+        while True:
+            # take whatever has queued up, so that the time ins are written together
+            raiders = [await self._raiders.get()]
+            while not self._raiders.empty() and len(raiders) < 100:
+                raiders.append(self._raiders.get_nowait())
+
+            by_guild: Dict[int, List[discord.Member]] = {}
+            for raider in raiders:
+                by_guild.setdefault(raider.guild.id, []).append(raider)
+
+            for members in by_guild.values():
+                try:
+                    await self.__time_out_raid(members, detector.time_out_minutes)
+                except Exception:
+                    log.exception('Failed to time out raiders')
+
+    async def __time_out_raid(
+        self, members: List[discord.Member], minutes: int
+    ) -> None:
+        guild = members[0].guild
+        prefs = await self.bot.get_guild_prefs(guild)
+        role = prefs.guild_time_out_role
+
+        if role is None or guild.me is None:
+            return
+
+        members = [member for member in members if role not in member.roles]
+        results = await asyncio.gather(
+            *(self.__time_out_raider(member, role) for member in members)
+        )
+        timed_out = [member for member, ok in zip(members, results) if ok]
+
+        if not timed_out:
+            return
+
+        for member in timed_out:
+            self.bot.punishments.add(guild.id, member.id, TIME_OUT)
+
+        await self.bot.create_actions(
+            pendulum.now().add(minutes=minutes),
+            'time_in',
+            [(guild.id, member.id) for member in timed_out],
+            moderator_id=guild.me.id,
+            moderator=str(guild.me),
+            channel_id=None,
+        )
+
+        if guild.system_channel is not None:
+            await guild.system_channel.send(
+                embed=discord.Embed(
+                    title='Raid detected',
+                    color=discord.Color.red(),
+                    description=f'Timed out {len(timed_out)} new accounts for '
+                    f'{minutes} minutes',
+                )
+            )
+
+    async def __time_out_raider(
+        self, member: discord.Member, role: discord.Role
+    ) -> bool:
+        bucket = self._raid_bucket
+        assert bucket is not None
+
+        while not bucket.consume():
+            await asyncio.sleep(bucket.delay())
+
+        try:
+            self.bot.role_hierarchy.check((role,))
+            await member.add_roles(role, reason='Joined during a raid')
+        except (discord.HTTPException, CannotManageRole) as e:
+            log.warning(
+                'Could not time out %s in guild %s: %s', member.id, member.guild.id, e
+            )
+            return False
+
+        return True
+
     @commands.command(aliases=['untimeout'])
     async def timein(self, ctx: GuildContext, member: discord.Member) -> None:
         ctx.has_error = await self.__timein(
@@ -245,31 +548,21 @@ class Moderation(commands.Cog[Context]):
     @commands.Cog.listener()
     async def on_time_in_action_complete(self, action: DelayedAction) -> None:
         guild_id, member_id = action.args  # type: int, int
-        mod_id: int = action.kwargs['moderator_id']
         channel_id: int = action.kwargs['channel_id']
 
+        # the punishment is over whether or not the member is still around
+        self.bot.punishments.remove(guild_id, member_id, TIME_OUT)
+
         guild, member = self.bot.get_guild_member(guild_id, member_id)
 
         if guild is None or member is None:
             return
 
-        moderator: Optional[Union[discord.User, discord.Member]] = guild.get_member(
-            mod_id
-        )
-
-        if moderator is None:
-            try:
-                moderator = await self.bot.fetch_user(mod_id)
-            except Exception:
-                moderator_str = f'Moderator ID {mod_id}'
-            else:
-                moderator_str = f'{moderator} (ID: {mod_id})'
-        else:
-            moderator_str = f'{moderator} (ID: {mod_id})'
+        moderator_str = self.__describe_moderator(action)
 
         channel = self.bot.get_channel(channel_id) or guild.system_channel
 
-        await self.__unmute(
+        await self.__timein(
             guild,
             member,
             channel if isinstance(channel, discord.TextChannel) else None,
@@ -281,6 +574,7 @@ class Moderation(commands.Cog[Context]):
     async def warn(
         self, ctx: GuildContext, member: discord.Member, *, reason: Optional[str] = None
     ) -> None:
+        await self.bot.warning_counts.load(ctx.guild.id)
         await Warning.create(
             guild_id=ctx.guild.id,
             member_id=member.id,
@@ -289,6 +583,109 @@ class Moderation(commands.Cog[Context]):
             timestamp=pendulum.now(),
         )
 
+        before, after = self.bot.warning_counts.adjust(ctx.guild.id, member.id, 1)
+        step = crossed(policy_steps((await ctx.guild_prefs).warn_policy), before, after)
+
+        if step is not None:
+            ctx.has_error = await self.__escalate(ctx, member, step, after)
+
+    async def __escalate(
+        self,
+        ctx: GuildContext,
+        member: discord.Member,
+        step: EscalationStep,
+        count: int,
+    ) -> bool:
+        reason = f'Reached {count} warnings, last warned by {ctx.author}'
+
+        if step.action == 'mute':
+            return await self.__mute(
+                ctx.guild, member, ctx.channel, ctx.author, step.minutes, reason
+            )
+        elif step.action == 'timeout':
+            return await self.__timeout(
+                ctx.guild, member, ctx.channel, ctx.author, step.minutes, reason
+            )
+        else:
+            return await self.__ban(
+                ctx.guild, member, ctx.channel, ctx.author, step.minutes, reason
+            )
+
+    async def __ban(
+        self,
+        guild: discord.Guild,
+        member: discord.Member,
+        channel: discord.TextChannel,
+        moderator: Union[discord.User, discord.Member],
+        minutes: Optional[int],
+        reason: str,
+    ) -> bool:
+        try:
+            await guild.ban(member, reason=reason)
+        except discord.Forbidden:
+            log.error(f'Could not ban {member.mention} in {guild.name} ({guild.id})')
+            await channel.send(
+                embed=discord.Embed(
+                    title='Permissions incorrect',
+                    color=discord.Color.red(),
+                    description=f'Could not ban {member.mention}. Please make sure '
+                    'the `Bothanasius` role is higher than their highest role.',
+                )
+            )
+
+            return True
+        except discord.HTTPException as e:
+            log.warning('Could not ban %s in guild %s: %s', member.id, guild.id, e)
+            await channel.send(
+                embed=discord.Embed(
+                    color=discord.Color.red(),
+                    description=f'Could not ban {member.mention}',
+                )
+            )
+
+            return True
+
+        await channel.send(
+            embed=discord.Embed(
+                color=discord.Color.green(),
+                description=f'{member.name} ({member}) has been banned',
+            )
+        )
+
+        if minutes is None:
+            await self.bot.remove_action('unban', guild.id, member.id)
+        else:
+            await self.bot.create_or_update_action(
+                pendulum.now().add(minutes=minutes),
+                'unban',
+                guild.id,
+                member.id,
+                moderator_id=moderator.id,
+                moderator=str(moderator),
+                channel_id=channel.id,
+            )
+
+        return False
+
+    @commands.Cog.listener()
+    async def on_unban_action_complete(self, action: DelayedAction) -> None:
+        guild_id, user_id = action.args  # type: int, int
+        guild = self.bot.get_guild(guild_id)
+
+        if guild is None:
+            return
+
+        try:
+            await guild.unban(
+                discord.Object(id=user_id),
+                reason=f'Automatic unban from ban on {action.created_at} by '
+                f'{self.__describe_moderator(action)}',
+            )
+        except discord.NotFound:
+            pass
+        except discord.HTTPException:
+            log.exception('Could not unban %s in guild %s', user_id, guild_id)
+
     @commands.command()
     async def warnings(
         self, ctx: GuildContext, member: Optional[discord.Member] = None
@@ -306,12 +703,18 @@ class Moderation(commands.Cog[Context]):
         else:
             title = f'Warnings for {member}'
             warnings = await Warning.get_for_member(ctx.guild, member)
+            names = await ctx.bot.user_cache.fetch_many(
+                [warning.moderator_id for warning in warnings]
+                + [
+                    int(warning.cleared_by)
+                    for warning in warnings
+                    if warning.cleared_by is not None
+                ]
+            )
 
             for warning in warnings:
                 timestamp = warning.timestamp
-                moderator = (
-                    ctx.bot.get_user(warning.moderator_id) or warning.moderator_id
-                )
+                moderator = names[warning.moderator_id] or warning.moderator_id
 
                 warning_title = underline(bold(f'ID: {warning.id}'))
 
@@ -329,9 +732,7 @@ class Moderation(commands.Cog[Context]):
                 )
 
                 if warning.cleared_by is not None and warning.cleared_on is not None:
-                    cleared_by = (
-                        ctx.bot.get_user(int(warning.cleared_by)) or warning.cleared_by
-                    )
+                    cleared_by = names[int(warning.cleared_by)] or warning.cleared_by
                     paginator.add_line(f'\t{bold("Cleared by:")} {cleared_by}')
                     paginator.add_line(
                         f'\t{bold("Cleared on:")} '
@@ -354,13 +755,17 @@ class Moderation(commands.Cog[Context]):
     async def clearwarns(
         self, ctx: GuildContext, member: discord.Member, id: Optional[int] = None
     ) -> None:
+        await self.bot.warning_counts.load(ctx.guild.id)
+
         if id is None:
-            await Warning.clear_all(ctx.guild, member, ctx.author.id)
+            cleared = await Warning.clear_all(ctx.guild, member, ctx.author.id)
             await ctx.send_response(f'Warnings cleared for {member}')
         else:
-            await Warning.clear_one(ctx.guild, member, id, ctx.author.id)
+            cleared = await Warning.clear_one(ctx.guild, member, id, ctx.author.id)
             await ctx.send_response(f'Warning {id} cleared for {member}')
 
+        self.bot.warning_counts.adjust(ctx.guild.id, member.id, -cleared)
+
     @commands.command()
     async def kick(
         self, ctx: GuildContext, member: discord.Member, reason: Optional[str] = None
@@ -375,6 +780,186 @@ class Moderation(commands.Cog[Context]):
         await ctx.guild.ban(user, reason=reason)
         await ctx.send_response(f'{user.name} ({user}) has been banned')
 
+    async def __lock(self, guild: discord.Guild, reason: str) -> Tuple[int, int]:
+        everyone = guild.default_role
+        channels = guild.text_channels
+
+        # recorded first so that a lockdown cut short can still be undone
+        await LockedChannel.lock(
+            guild.id,
+            {
+                channel.id: channel.overwrites_for(everyone).send_messages
+                for channel in channels
+            },
+        )
+
+        changes: List[OverwriteChange] = []
+
+        for channel in channels:
+            overwrite = channel.overwrites_for(everyone)
+
+            if overwrite.send_messages is not False:
+                overwrite.update(send_messages=False)
+                changes.append(OverwriteChange(channel, everyone, overwrite))
+
+        failed = await self.bot.overwrites.apply(changes, reason=reason)
+
+        return len(changes) - len(failed), len(failed)
+
+    async def __unlock(self, guild: discord.Guild, reason: str) -> Tuple[int, int]:
+        everyone = guild.default_role
+        locked = await LockedChannel.for_guild(guild.id)
+        changes: List[OverwriteChange] = []
+        # deleted channels and ones already as recorded have nothing to restore
+        restored: List[int] = []
+
+        for channel_id, send_messages in locked.items():
+            channel = guild.get_channel(channel_id)
+
+            if channel is None:
+                restored.append(channel_id)
+                continue
+
+            overwrite = channel.overwrites_for(everyone)
+
+            if overwrite.send_messages is send_messages:
+                restored.append(channel_id)
+                continue
+
+            overwrite.update(send_messages=send_messages)
+            changes.append(
+                OverwriteChange(
+                    channel, everyone, None if overwrite.is_empty() else overwrite
+                )
+            )
+
+        failed = await self.bot.overwrites.apply(changes, reason=reason)
+        failed_ids = {change.channel.id for change in failed}
+        restored.extend(
+            change.channel.id
+            for change in changes
+            if change.channel.id not in failed_ids
+        )
+
+        # channels that could not be restored stay recorded for the next unlock
+        await LockedChannel.release(guild.id, restored)
+
+        return len(changes) - len(failed), len(failed)
+
+    @commands.command()
+    async def lockdown(self, ctx: GuildContext, minutes: Optional[int] = None) -> None:
+        """Stop @everyone from sending messages in every text channel
+
+        Pass a number of minutes to unlock automatically.
+        """
+        locked, failed = await self.__lock(ctx.guild, f'Lockdown by {ctx.author}')
+
+        if minutes is None:
+            await self.bot.remove_action('unlock', ctx.guild.id)
+        else:
+            await self.bot.create_or_update_action(
+                pendulum.now().add(minutes=minutes),
+                'unlock',
+                ctx.guild.id,
+                moderator_id=ctx.author.id,
+                moderator=str(ctx.author),
+                channel_id=ctx.channel.id,
+            )
+
+        await self.__report_lock(ctx.channel, 'Locked', locked, failed)
+
+    @commands.command()
+    async def unlock(self, ctx: GuildContext) -> None:
+        """Undo a lockdown, restoring each channel as it was before"""
+        await self.bot.remove_action('unlock', ctx.guild.id)
+        restored, failed = await self.__unlock(ctx.guild, f'Unlocked by {ctx.author}')
+
+        ctx.has_error = failed > 0
+        await self.__report_lock(ctx.channel, 'Unlocked', restored, failed)
+
+    @commands.Cog.listener()
+    async def on_unlock_action_complete(self, action: DelayedAction) -> None:
+        guild_id: int = action.args[0]
+        channel_id: int = action.kwargs['channel_id']
+        guild = self.bot.get_guild(guild_id)
+
+        if guild is None:
+            return
+
+        restored, failed = await self.__unlock(
+            guild,
+            f'Automatic unlock from lockdown on {action.created_at} by '
+            f'{self.__describe_moderator(action)}',
+        )
+
+        channel = self.bot.get_channel(channel_id) or guild.system_channel
+
+        if isinstance(channel, discord.TextChannel):
+            await self.__report_lock(channel, 'Unlocked', restored, failed)
+
+    async def __report_lock(
+        self, channel: discord.TextChannel, verb: str, changed: int, failed: int
+    ) -> None:
+        description = f'{verb} {changed} channels'
+
+        if failed:
+            description += (
+                f', {failed} could not be changed. Please make sure the '
+                '`Bothanasius` role can manage permissions in every channel.'
+            )
+
+        await channel.send(
+            embed=discord.Embed(
+                color=discord.Color.red() if failed else discord.Color.green(),
+                description=description,
+            )
+        )
+
+    @commands.command()
+    async def purge(self, ctx: GuildContext, *, options: str = '') -> None:
+        """Delete recent messages in this channel
+
+        `purge [limit] [options]` deletes up to `limit` (default 100) messages that
+        match every option given. The following options are valid:
+
+        `--user`: Only messages by this user (can be given more than once)
+        `--match`: Only messages matching this regular expression
+        `--attachments`: Only messages with attachments
+        `--max-age`: Only messages newer than this (formatted like `invite`)
+        `--scan`: How many messages to look through (default 1000, at most 5000)
+
+        Pinned messages are never deleted.
+        """
+        parsed = await PurgeArgumentParser.parse(ctx, options)
+
+        if parsed is None:
+            return
+
+        status = await ctx.send_response('Scanning messages…', title='Purge')
+
+        async def report(progress: PurgeProgress) -> None:
+            description = (
+                f'Deleted {progress.deleted} of {progress.scanned} messages scanned'
+            )
+
+            if progress.failed:
+                description += f', {progress.failed} could not be deleted'
+
+            color = discord.Color.red() if progress.failed else discord.Color.green()
+
+            await status.edit(
+                embed=discord.Embed(
+                    title='Purge' if progress.done else 'Purging…',
+                    color=color,
+                    description=description,
+                )
+            )
+
+        result = await purge_history(
+            ctx.channel, parsed, before=ctx.message, progress=report
+        )
+        ctx.has_error = result.failed > 0
+
     @commands.command()
     async def invite(
         self,
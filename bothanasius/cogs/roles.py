@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Any, Dict, FrozenSet, Optional
 
 import discord
 
@@ -9,9 +9,12 @@ from discord.ext import commands
 from botus_receptus.formatting import EmbedPaginator
 
 from ..bothanasius import Bothanasius
+from ..cache import GuildCache
 from ..checks import check_guild_only, admin_only
 from ..context import Context, GuildContext
+from ..hierarchy import CannotManageRole
 from ..db.roles import SelfRole
+from ..stateful import StatefulCog
 
 
 class NotAssignable(commands.CommandError):
@@ -19,9 +22,28 @@ class NotAssignable(commands.CommandError):
         super().__init__(message=f'The role \'{name}\' is not assignable')
 
 
-class Roles(commands.Cog[Context]):
+class Roles(commands.Cog[Context], StatefulCog):
+    self_roles: GuildCache[FrozenSet[int]]
+
     def __init__(self, bot: Bothanasius) -> None:
         self.bot = bot
+        self.self_roles = GuildCache(
+            SelfRole.__tablename__, encode=sorted, decode=frozenset
+        )
+
+    def cog_unload(self) -> None:
+        self.self_roles.close()
+
+    def export_state(self) -> Dict[str, Any]:
+        return {'self_roles': self.self_roles.entries()}
+
+    def import_state(self, state: Dict[str, Any]) -> None:
+        self.self_roles.adopt(state['self_roles'])
+
+    async def __get_role_ids(self, guild: discord.Guild) -> FrozenSet[int]:
+        return await self.self_roles.get(
+            guild.id, lambda: SelfRole.get_role_ids(guild.id)
+        )
 
     async def cog_check(self, ctx: Context) -> bool:
         return check_guild_only(ctx)
@@ -29,6 +51,12 @@ class Roles(commands.Cog[Context]):
     async def cog_command_error(self, ctx: Context, error: Exception) -> None:
         if isinstance(error, NotAssignable):
             await ctx.send_error(error.args[0])
+        elif isinstance(error, CannotManageRole):
+            await ctx.send_error(
+                f'Could not change the `{error.role.name}` role. Please make sure '
+                f'the `Bothanasius` role is higher than the `{error.role.name}` role.',
+                title='Permissions incorrect',
+            )
 
     @commands.Cog.listener()
     async def on_guild_role_delete(self, role: discord.Role) -> None:
@@ -37,14 +65,11 @@ class Roles(commands.Cog[Context]):
     async def __get_self_role(
         self, ctx: GuildContext, role: discord.Role
     ) -> discord.Role:
-        if (
-            await SelfRole.get(
-                {SelfRole.guild_id.name: ctx.guild.id, SelfRole.role_id.name: role.id}
-            )
-            is None
-        ):
+        if role.id not in await self.__get_role_ids(ctx.guild):
             raise NotAssignable(role.name)
 
+        self.bot.role_hierarchy.check((role,))
+
         return role
 
     @commands.command()
@@ -63,12 +88,10 @@ class Roles(commands.Cog[Context]):
     async def roles(self, ctx: GuildContext) -> None:
         paginator = EmbedPaginator()
 
-        async for record in SelfRole.get_for_guild(ctx.guild):
-            role = ctx.guild.get_role(record.role_id)
-
-            if role is None:
-                continue
+        role_ids = await self.__get_role_ids(ctx.guild)
+        roles = filter(None, map(ctx.guild.get_role, role_ids))
 
+        for role in sorted(roles, reverse=True):
             paginator.add_line(role.name)
 
         page: Optional[str] = None
@@ -84,7 +107,7 @@ class Roles(commands.Cog[Context]):
     @commands.command()
     async def addselfrole(self, ctx: GuildContext, *, role: discord.Role) -> None:
         try:
-            await SelfRole.create(guild_id=ctx.guild.id, role_id=role.id)
+            await SelfRole.add(ctx.guild, role)
         except UniqueViolationError:
             await ctx.send_response(f'\'{role.name}\' is already self-assignable')
         else:
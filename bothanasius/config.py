@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+from typing import Any, Dict, cast
+
+from botus_receptus import Config
+
+
+def get_section(config: Config, name: str) -> Dict[str, Any]:
+    return cast(Dict[str, Any], config).get(name) or {}
@@ -96,7 +96,7 @@ class Context(PaginatedContext, EmbedContext):
     async def guild_prefs(self) -> GuildPrefs:
         assert self.guild is not None
 
-        return await GuildPrefs.for_guild(self.guild)
+        return await self.bot.get_guild_prefs(self.guild)
 
 
 class GuildContext(Context, BaseGuildContext):
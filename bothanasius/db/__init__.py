@@ -4,3 +4,5 @@ from .linked_roles import LinkedRole  # noqa
 from .mod import Warning  # noqa
 from .roles import SelfRole  # noqa
 from .delayed_action import DelayedAction  # noqa
+from .cache_changes import CacheChange  # noqa
+from .lockdown import LockedChannel  # noqa
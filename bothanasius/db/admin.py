@@ -3,7 +3,7 @@ from __future__ import annotations
 import discord
 import argparse
 import shlex
-from typing import TYPE_CHECKING, Optional, NoReturn, Iterator
+from typing import TYPE_CHECKING, Any, Optional, NoReturn, Iterator
 from mypy_extensions import TypedDict
 
 import sqlalchemy
@@ -12,6 +12,8 @@ from botus_receptus.util import parse_duration
 from gino.dialects.asyncpg import JSONB
 
 from .base import db, Base
+from .instrumentation import traced
+from .invalidation import bus
 
 if TYPE_CHECKING:
     from ..context import Context
@@ -95,6 +97,10 @@ class GuildPrefs(Base):
     unique = db.BooleanProperty(prop_name='invite_prefs', default=True)
 
     time_out_role = db.Column(Snowflake())
+    # channel overwrite state of the mute and time out roles at the last sync
+    overwrite_fingerprint = db.Column(db.String())
+    # see bothanasius.escalation.policy_steps
+    warn_policy = db.Column(JSONB(), nullable=False, server_default='{}')
 
     __guild: discord.Guild
 
@@ -142,45 +148,77 @@ class GuildPrefs(Base):
             else time_out_role
         )
 
+    def with_guild(self, guild: discord.Guild) -> GuildPrefs:
+        self.__guild = guild
+        return self
+
+    async def save(self, **values: Any) -> None:
+        await self.update(**values).apply()
+        bus.publish(GuildPrefs.__tablename__, self.guild_id)
+
     async def add_admin_role(self, role: discord.Role) -> None:
         if self.admin_roles is not None and role.id in self.admin_roles:
             return
 
-        await self.update(
+        await self.save(
             admin_roles=db.func.array_append(GuildPrefs.admin_roles, str(role.id))
-        ).apply()
+        )
 
     async def remove_admin_role(self, role: discord.Role) -> None:
-        await self.update(
+        await self.save(
             admin_roles=db.func.array_remove(GuildPrefs.admin_roles, str(role.id))
-        ).apply()
+        )
 
     async def add_mod_role(self, role: discord.Role) -> None:
         if self.mod_roles is not None and role.id in self.mod_roles:
             return
 
-        await self.update(
+        await self.save(
             mod_roles=db.func.array_append(GuildPrefs.mod_roles, str(role.id))
-        ).apply()
+        )
 
     async def remove_mod_role(self, role: discord.Role) -> None:
-        await self.update(
+        await self.save(
             mod_roles=db.func.array_remove(GuildPrefs.mod_roles, str(role.id))
-        ).apply()
+        )
 
     async def set_mute_role(self, role: Optional[discord.Role]) -> None:
         if role is None:
             role = discord.utils.get(self.__guild.roles, name='Muted')
 
-        await self.update(mute_role=role.id if role is not None else None).apply()
+        await self.save(mute_role=role.id if role is not None else None)
+
+    async def set_warn_step(
+        self, warnings: int, action: str, minutes: Optional[int]
+    ) -> None:
+        await self.save(
+            warn_policy=GuildPrefs.warn_policy.op('||')(
+                sqlalchemy.cast(
+                    {str(warnings): {'action': action, 'minutes': minutes}}, JSONB()
+                )
+            )
+        )
+
+    async def remove_warn_step(self, warnings: int) -> None:
+        await self.save(
+            warn_policy=GuildPrefs.warn_policy.op('-')(
+                sqlalchemy.cast(str(warnings), sqlalchemy.Text())
+            )
+        )
+
+    @staticmethod
+    @traced
+    async def exists(guild_id: int) -> bool:
+        return bool(
+            await db.scalar(db.exists().where(GuildPrefs.guild_id == guild_id).select())
+        )
 
     @staticmethod
+    @traced
     async def for_guild(guild: discord.Guild) -> GuildPrefs:
         prefs = await GuildPrefs.query.where(
             GuildPrefs.guild_id == guild.id
         ).gino.first()
         assert prefs is not None
 
-        prefs.__guild = guild
-
-        return prefs
+        return prefs.with_guild(guild)
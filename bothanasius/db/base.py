@@ -1,18 +1,170 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Optional, Union, List
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union, List, Sequence, Tuple
+from typing_extensions import Final
 
 import re
+import asyncio
+import attr
 import pendulum
 import datetime
+import logging
 
 from botus_receptus.gino import Gino, ModelMixin
+from gino import create_engine
 from sqlalchemy import types
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.dialects.postgresql.base import ischema_names, PGTypeCompiler
 from sqlalchemy.sql import expression
 
-db = Gino()
+from ..metrics import Gauge
+
+log = logging.getLogger(__name__)
+
+replica_lag: Final = Gauge(
+    'bothanasius_db_replica_lag_seconds',
+    'Replication lag of each read replica, -1 when unreachable or not streaming',
+    ('replica',),
+)
+
+# seconds since the last replayed transaction, 0 if the replica has replayed
+# everything it has received, or NULL if it isn't receiving from the primary (it
+# has then replayed everything it has, however old). Reading the receiver's
+# status needs the pg_read_all_stats role.
+REPLICA_LAG_QUERY: Final = '''
+    SELECT CASE
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(
+            extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+'''
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Replica(object):
+    name: str
+    url: str
+    options: Dict[str, Any]
+    # None until connected
+    engine: Optional[Any] = None
+    # None until checked, or while unreachable
+    lag: Optional[float] = None
+
+
+class Database(Gino):
+    engine_options: Dict[str, Any]
+    replicas: List[Replica]
+    max_replica_lag: float
+
+    _next_replica: int
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.engine_options = {}
+        self.replicas = []
+        self.max_replica_lag = 5.0
+        self._next_replica = 0
+
+    async def set_bind(self, bind: Any, loop: Any = None, **kwargs: Any) -> Any:
+        # options configured by the bot apply to every engine bound from a URL
+        return await super().set_bind(
+            bind, loop=loop, **{**self.engine_options, **kwargs}
+        )
+
+    async def add_replica(self, url: str, loop: Any = None, **kwargs: Any) -> None:
+        """
+        Adds a replica to read from once it has been checked. One that cannot be
+        reached yet is left unhealthy and connected to again on the next check.
+        """
+        replica = Replica(
+            f'replica{len(self.replicas)}',
+            url,
+            {'loop': loop, **self.engine_options, **kwargs},
+        )
+        self.replicas.append(replica)
+        await self.__connect_replica(replica)
+
+    async def __connect_replica(self, replica: Replica) -> None:
+        try:
+            replica.engine = await create_engine(replica.url, **replica.options)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.warning('Could not connect to %s', replica.name, exc_info=True)
+
+    async def close_replicas(self) -> None:
+        replicas, self.replicas = self.replicas, []
+
+        for replica in replicas:
+            if replica.engine is not None:
+                await replica.engine.close()
+
+    @property
+    def reader(self) -> Any:
+        """
+        An engine for queries that tolerate slightly stale data: a replica whose
+        lag is within `max_replica_lag`, or the primary if there is none
+        """
+        healthy = [
+            replica
+            for replica in self.replicas
+            if replica.lag is not None and replica.lag <= self.max_replica_lag
+        ]
+
+        if not healthy:
+            return self.bind
+
+        self._next_replica = (self._next_replica + 1) % len(healthy)
+        return healthy[self._next_replica].engine
+
+    async def check_replicas(self) -> None:
+        for replica in self.replicas:
+            if replica.engine is None:
+                await self.__connect_replica(replica)
+
+            if replica.engine is not None:
+                try:
+                    lag = await replica.engine.scalar(db.text(REPLICA_LAG_QUERY))
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    # a dropped connection raises InterfaceError, which is not a
+                    # PostgresError
+                    if replica.lag is not None:
+                        log.warning(
+                            'Replica %s is unreachable', replica.name, exc_info=True
+                        )
+                    replica.lag = None
+                else:
+                    if lag is None and replica.lag is not None:
+                        log.warning('Replica %s is not streaming', replica.name)
+                    replica.lag = float(lag) if lag is not None else None
+
+            replica_lag.set(
+                replica.lag if replica.lag is not None else -1, replica=replica.name
+            )
+
+
+db = Database()
+
+# (shard_count, shard_ids) owned by this process
+Shards = Tuple[int, Sequence[int]]
+
+
+def on_shards(column: Any, shards: Shards) -> Any:
+    """
+    Matches rows whose guild id is handled by one of `shards`, using the same
+    formula Discord uses to assign guilds to shards
+    """
+    shard_count, shard_ids = shards
+    shard = db.cast(column, db.BigInteger()).op('>>')(22).op('%')(shard_count)
+    return shard.in_(list(shard_ids))
+
 
 if TYPE_CHECKING:
     from gino.declarative import declarative_base
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import Dict, Set
+
+from botus_receptus.gino import Snowflake
+
+from .base import db, Base
+from .instrumentation import traced
+
+
+class CacheChange(Base):
+    """
+    The last time rows of a guild changed in a cached table, maintained by the
+    notify_cache_invalidation trigger
+    """
+
+    __tablename__ = 'cache_changes'
+
+    table_name = db.Column(db.String(), primary_key=True)
+    guild_id = db.Column(Snowflake(), primary_key=True)
+    changed_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        server_default=db.func.clock_timestamp(),
+        index=True,
+    )
+
+    @staticmethod
+    @traced
+    async def now() -> float:
+        timestamp: float = await db.scalar(
+            db.select([db.func.extract('epoch', db.func.clock_timestamp())])
+        )
+        return float(timestamp)
+
+    @staticmethod
+    @traced
+    async def changed_since(timestamp: float) -> Dict[str, Set[int]]:
+        rows = (
+            await db.select([CacheChange.table_name, CacheChange.guild_id])
+            .where(CacheChange.changed_at > db.func.to_timestamp(timestamp))
+            .gino.all()
+        )
+
+        changed: Dict[str, Set[int]] = {}
+
+        for table_name, guild_id in rows:
+            changed.setdefault(table_name, set()).add(guild_id)
+
+        return changed
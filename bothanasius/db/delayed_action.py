@@ -1,16 +1,27 @@
 from __future__ import annotations
 
+from botus_receptus.gino import Snowflake
 from gino.json_support import ObjectProperty, ArrayProperty
 from sqlalchemy.dialects.postgresql import JSONB
-from typing import Any, Optional, Dict
+from typing import Any, Collection, List, Optional, Dict, Sequence
 
-from .base import db, Base, DateTime
+from .base import db, Base, DateTime, Shards, on_shards
+from .instrumentation import traced
+
+
+def _match_arg(index: int, arg: Any) -> Any:
+    # bind the value so that the statement text (and asyncpg's prepared statement)
+    # is the same for every member
+    return db.text(
+        f"(delayed_actions.profile #> '{{args,{index}}}')::text = :arg{index}"
+    ).bindparams(**{f'arg{index}': str(arg)})
 
 
 class DelayedAction(Base):
     __tablename__ = 'delayed_actions'
 
     id = db.Column(db.Integer(), primary_key=True)
+    guild_id = db.Column(Snowflake(), nullable=False, index=True)
     created_at = db.Column(DateTime(), nullable=False)
     expires = db.Column(DateTime(), nullable=False, index=True)
     event = db.Column(db.String(), nullable=False)
@@ -20,28 +31,71 @@ class DelayedAction(Base):
     kwargs: 'ObjectProperty[Dict[str, Any]]' = db.ObjectProperty(default={})
 
     @staticmethod
-    async def get_active() -> Optional[DelayedAction]:
+    @traced
+    async def get_active(shards: Optional[Shards] = None) -> Optional[DelayedAction]:
+        query = DelayedAction.query
+
+        if shards is not None:
+            query = query.where(on_shards(DelayedAction.guild_id, shards))
+
+        return await query.order_by(DelayedAction.expires.asc()).limit(1).gino.first()
+
+    @staticmethod
+    @traced
+    async def get_for_events(
+        events: Collection[str], shards: Optional[Shards] = None
+    ) -> List[DelayedAction]:
+        query = DelayedAction.query.where(DelayedAction.event.in_(list(events)))
+
+        if shards is not None:
+            query = query.where(on_shards(DelayedAction.guild_id, shards))
+
+        return await query.gino.all()
+
+    @staticmethod
+    @traced
+    async def create_many(values: Sequence[Dict[str, Any]]) -> None:
+        """
+        Inserts several actions with a single statement
+        """
+        if values:
+            await DelayedAction.insert().values(list(values)).gino.status()
+
+    @staticmethod
+    @traced
+    async def claim(id: int) -> Optional[DelayedAction]:
+        """
+        Deletes and returns the action unless another process has already claimed
+        or removed it
+        """
+        locked = (
+            db.select([DelayedAction.id])
+            .where(DelayedAction.id == id)
+            .with_for_update(skip_locked=True)
+            .as_scalar()
+        )
+
         return (
-            await DelayedAction.query.order_by(DelayedAction.expires.asc())
-            .limit(1)
+            await DelayedAction.delete.where(DelayedAction.id == locked)
+            .returning(*DelayedAction)
             .gino.first()
         )
 
     @staticmethod
+    @traced
     async def get_by_event(event: str, *args: Any) -> Optional[DelayedAction]:
         query = DelayedAction.query.where(DelayedAction.event == event)
 
-        for index, arg in enumerate(args):
-            query = query.where(
-                db.text(
-                    f"(delayed_actions.profile #> '{{args,{index}}}')::text "
-                    f"= '{arg}'"
-                )
-            )
+        if args:
+            query = query.where(DelayedAction.guild_id == args[0])
+
+        for index, arg in enumerate(args[1:], 1):
+            query = query.where(_match_arg(index, arg))
 
         return await query.gino.first()
 
     @staticmethod
+    @traced
     async def delete_by_id(id: int) -> Optional[DelayedAction]:
         return (
             await DelayedAction.delete.where(DelayedAction.id == id)
@@ -50,15 +104,14 @@ class DelayedAction(Base):
         )
 
     @staticmethod
+    @traced
     async def delete_by_event(event: str, *args: Any) -> Optional[DelayedAction]:
         query = DelayedAction.delete.where(DelayedAction.event == event)
 
-        for index, arg in enumerate(args):
-            query = query.where(
-                db.text(
-                    f"(delayed_actions.profile #> '{{args,{index}}}')::text "
-                    f"= '{arg}'"
-                )
-            )
+        if args:
+            query = query.where(DelayedAction.guild_id == args[0])
+
+        for index, arg in enumerate(args[1:], 1):
+            query = query.where(_match_arg(index, arg))
 
         return await query.returning(*DelayedAction).gino.first()
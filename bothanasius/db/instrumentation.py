@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    Optional,
+    Set,
+    TypeVar,
+    cast,
+)
+from typing_extensions import Final
+
+import asyncpg
+import attr
+import functools
+import inspect
+import logging
+import time
+
+from ..metrics import Histogram, db_query_latency, db_query_rows
+
+log = logging.getLogger(__name__)
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+UNKNOWN_SOURCE = '<ad hoc>'
+
+_source: ContextVar[Optional[str]] = ContextVar('query_source', default=None)
+_budget: ContextVar[Optional[QueryBudget]] = ContextVar('query_budget', default=None)
+
+
+class TooManyQueries(AssertionError):
+    def __init__(self, label: str, limit: int, statements: Dict[str, int]) -> None:
+        total = sum(statements.values())
+        details = '\n'.join(
+            f'  {count}x {statement}' for statement, count in statements.items()
+        )
+        super().__init__(
+            f'{label or "Block"} issued {total} queries (limit {limit}):\n{details}'
+        )
+
+
+@attr.s(auto_attribs=True, slots=True)
+class QueryBudget(object):
+    limit: int
+    label: str = ''
+    statements: Dict[str, int] = attr.ib(factory=dict)
+
+    @property
+    def count(self) -> int:
+        return sum(self.statements.values())
+
+    def add(self, statement: str) -> None:
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+
+@attr.s(auto_attribs=True, slots=True)
+class StatementStats(object):
+    statement: str
+    latency: Histogram = attr.ib(factory=Histogram)
+    rows: int = 0
+    sources: Set[str] = attr.ib(factory=set)
+
+
+class QueryRecorder(object):
+    statements: Dict[str, StatementStats]
+    slow_query_threshold: Optional[float]
+
+    def __init__(self) -> None:
+        self.statements = {}
+        self.slow_query_threshold = None
+
+    def record(self, statement: str, elapsed: float, rows: int) -> None:
+        source = _source.get() or UNKNOWN_SOURCE
+
+        stats = self.statements.get(statement)
+        if stats is None:
+            stats = self.statements[statement] = StatementStats(statement)
+
+        stats.latency.observe(elapsed)
+        stats.rows += rows
+        stats.sources.add(source)
+
+        db_query_latency.observe(elapsed, source=source)
+        db_query_rows.inc(rows, source=source)
+
+        budget = _budget.get()
+        if budget is not None:
+            budget.add(statement)
+
+        if (
+            self.slow_query_threshold is not None
+            and elapsed >= self.slow_query_threshold
+        ):
+            log.warning(
+                'Slow query (%.3fs, %d rows) from %s: %s',
+                elapsed,
+                rows,
+                source,
+                statement,
+            )
+
+    def reset(self) -> None:
+        self.statements.clear()
+
+
+recorder: Final = QueryRecorder()
+
+
+def _row_count(result: Any) -> int:
+    # gino asks for the status alongside the records, plain asyncpg calls don't
+    if isinstance(result, tuple):
+        result = result[0]
+
+    return len(result) if isinstance(result, list) else 0
+
+
+class InstrumentedConnection(asyncpg.Connection):
+    async def _do_execute(
+        self, query: str, executor: Any, timeout: Any, retry: bool = True
+    ) -> Any:
+        # asyncpg re-enters with retry=False after invalidating a cached statement;
+        # the outer call already accounts for it
+        if not retry:
+            return await super()._do_execute(query, executor, timeout, retry=retry)
+
+        start = time.perf_counter()
+        rows = 0
+
+        try:
+            result = await super()._do_execute(query, executor, timeout, retry=retry)
+            rows = _row_count(result[0])
+            return result
+        finally:
+            recorder.record(query, time.perf_counter() - start, rows)
+
+
+def traced(func: F) -> F:
+    """
+    Attribute every query issued by a model method to that method
+    """
+    name = func.__qualname__
+
+    if inspect.isasyncgenfunction(func):
+
+        @functools.wraps(func)
+        async def gen_wrapper(*args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+            iterator = func(*args, **kwargs)
+
+            # only attribute while the generator body runs, not while the caller
+            # is handling an item
+            try:
+                while True:
+                    token = _source.set(name)
+                    try:
+                        item = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        _source.reset(token)
+
+                    yield item
+            finally:
+                await iterator.aclose()
+
+        return cast(F, gen_wrapper)
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        token = _source.set(name)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _source.reset(token)
+
+    return cast(F, wrapper)
+
+
+@contextmanager
+def query_budget(limit: int, *, label: str = '') -> Iterator[QueryBudget]:
+    """
+    Fail with TooManyQueries when the enclosed block issues more than `limit`
+    queries
+    """
+    budget = QueryBudget(limit, label)
+    token = _budget.set(budget)
+
+    try:
+        yield budget
+    finally:
+        _budget.reset(token)
+
+    if budget.count > limit:
+        raise TooManyQueries(label, limit, budget.statements)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional
+from typing_extensions import Final
+
+import logging
+
+from .listener import Listener
+
+log = logging.getLogger(__name__)
+
+CHANNEL: Final = 'cache_invalidation'
+
+# called with the id of the guild whose rows changed, or None when anything
+# may have changed (e.g. after missing notifications)
+Callback = Callable[[Optional[int]], None]
+
+
+class InvalidationBus(object):
+    """
+    Fans out `<table>:<guild id>` notifications sent by the cache_invalidation
+    triggers to in-process subscribers. Mutators also publish locally so the
+    writing process never serves stale data while the notification is in flight.
+    """
+
+    _subscribers: Dict[str, List[Callback]]
+    _connected: bool
+
+    def __init__(self) -> None:
+        self._subscribers = {}
+        self._connected = False
+
+    def subscribe(self, table: str, callback: Callback) -> None:
+        self._subscribers.setdefault(table, []).append(callback)
+
+    def unsubscribe(self, table: str, callback: Callback) -> None:
+        callbacks = self._subscribers.get(table, [])
+
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def publish(self, table: str, guild_id: Optional[int]) -> None:
+        for callback in list(self._subscribers.get(table, [])):
+            try:
+                callback(guild_id)
+            except Exception:
+                log.exception('Error invalidating %s for guild %s', table, guild_id)
+
+    def attach(self, listener: Listener) -> None:
+        listener.listen(CHANNEL, self.__on_notification)
+        listener.on_connect(self.__on_connect)
+
+    def __on_notification(self, payload: str) -> None:
+        table, _, guild_id = payload.partition(':')
+        self.publish(table, int(guild_id))
+
+    def __on_connect(self) -> None:
+        # nothing can be stale before the first connection; after a reconnect we
+        # may have missed notifications, so drop everything
+        if self._connected:
+            for table in list(self._subscribers):
+                self.publish(table, None)
+
+        self._connected = True
+
+
+bus: Final = InvalidationBus()
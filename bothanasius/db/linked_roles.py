@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+from typing import List
+
+import discord
 from botus_receptus.gino import Snowflake
 
 from . import LtreeType
-from .base import db, Base
+from .base import db, Base, Ltree
+from .instrumentation import traced
+from .invalidation import bus
 
 
 class LinkedRole(Base):
@@ -19,3 +24,35 @@ class LinkedRole(Base):
         ),
         db.Index('linked_roles_path_gist_idx', 'path', postgresql_using='gist'),
     )
+
+    @staticmethod
+    @traced
+    async def for_guild(guild_id: int) -> List[LinkedRole]:
+        return await LinkedRole.query.where(LinkedRole.guild_id == guild_id).gino.all()
+
+    @staticmethod
+    @traced
+    async def link(
+        guild: discord.Guild, role: discord.Role, parent: discord.Role
+    ) -> None:
+        parent_record = await LinkedRole.get(
+            {LinkedRole.guild_id.name: guild.id, LinkedRole.role_id.name: parent.id}
+        )
+
+        if parent_record is None:
+            parent_record = await LinkedRole.create(
+                guild_id=guild.id, role_id=parent.id, path=Ltree(str(parent.id))
+            )
+
+        await LinkedRole.create(
+            guild_id=guild.id, role_id=role.id, path=parent_record.path + str(role.id)
+        )
+        bus.publish(LinkedRole.__tablename__, guild.id)
+
+    @staticmethod
+    @traced
+    async def unlink(guild: discord.Guild, role: discord.Role) -> None:
+        await LinkedRole.delete.where(LinkedRole.guild_id == guild.id).where(
+            LinkedRole.role_id == role.id
+        ).gino.status()
+        bus.publish(LinkedRole.__tablename__, guild.id)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional
+
+import asyncio
+import asyncpg
+import logging
+
+log = logging.getLogger(__name__)
+
+Callback = Callable[[str], None]
+
+MAX_BACKOFF = 60.0
+
+
+class Listener(object):
+    """
+    Keeps a dedicated connection LISTENing on a set of channels, reconnecting
+    whenever it is lost. Notifications sent while disconnected are gone, so
+    `on_connect` callbacks run after every (re)connect to let subscribers resync.
+    """
+
+    dsn: str
+    loop: asyncio.AbstractEventLoop
+    keepalive: float
+
+    _channels: Dict[str, List[Callback]]
+    _connect_callbacks: List[Callable[[], None]]
+    _connection: Optional[asyncpg.Connection]
+    _task: Optional['asyncio.Task[None]']
+
+    def __init__(
+        self, dsn: str, *, loop: asyncio.AbstractEventLoop, keepalive: float = 30.0
+    ) -> None:
+        self.dsn = dsn
+        self.loop = loop
+        self.keepalive = keepalive
+        self._channels = {}
+        self._connect_callbacks = []
+        self._connection = None
+        self._task = None
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed()
+
+    def listen(self, channel: str, callback: Callback) -> None:
+        self._channels.setdefault(channel, []).append(callback)
+
+    def on_connect(self, callback: Callable[[], None]) -> None:
+        self._connect_callbacks.append(callback)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = self.loop.create_task(self.__run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        await self.__close()
+
+    def __notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        for callback in self._channels.get(channel, []):
+            try:
+                callback(payload)
+            except Exception:
+                log.exception('Error handling notification on %s', channel)
+
+    async def __connect(self) -> None:
+        self._connection = await asyncpg.connect(self.dsn, loop=self.loop)
+
+        for channel in self._channels:
+            await self._connection.add_listener(channel, self.__notify)
+
+        log.info('Listening on %s', ', '.join(self._channels))
+
+        for callback in self._connect_callbacks:
+            callback()
+
+    async def __close(self) -> None:
+        connection, self._connection = self._connection, None
+
+        if connection is not None and not connection.is_closed():
+            try:
+                await connection.close()
+            except Exception:
+                connection.terminate()
+
+    async def __run(self) -> None:
+        backoff = 1.0
+
+        while True:
+            try:
+                await self.__connect()
+                backoff = 1.0
+
+                # asyncpg does not report a dropped connection to listeners, so
+                # find out by using it
+                while True:
+                    await asyncio.sleep(self.keepalive)
+                    assert self._connection is not None
+                    await self._connection.fetchval('SELECT 1', timeout=10)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # a connection the server dropped raises InterfaceError rather
+                # than a PostgresError, and anything else must not end the task
+                log.warning(
+                    'Lost LISTEN connection, reconnecting in %.0fs',
+                    backoff,
+                    exc_info=True,
+                )
+
+            await self.__close()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF)
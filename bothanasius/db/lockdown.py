@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from typing import Collection, Dict, Mapping, Optional
+
+from botus_receptus.gino import Snowflake
+from sqlalchemy.dialects.postgresql import insert
+
+from .base import db, Base
+from .instrumentation import traced
+
+
+class LockedChannel(Base):
+    __tablename__ = 'locked_channels'
+
+    guild_id = db.Column(Snowflake(), primary_key=True)
+    channel_id = db.Column(Snowflake(), primary_key=True)
+    # the @everyone send_messages overwrite before the lockdown, None if unset
+    send_messages = db.Column(db.Boolean())
+
+    @staticmethod
+    @traced
+    async def lock(guild_id: int, channels: Mapping[int, Optional[bool]]) -> None:
+        """
+        Records the state of `channels` before they are locked. Channels that are
+        already locked keep the state from before the first lockdown.
+        """
+        if not channels:
+            return
+
+        await db.status(
+            insert(LockedChannel)
+            .values(
+                [
+                    {
+                        'guild_id': guild_id,
+                        'channel_id': channel_id,
+                        'send_messages': send_messages,
+                    }
+                    for channel_id, send_messages in channels.items()
+                ]
+            )
+            .on_conflict_do_nothing()
+        )
+
+    @staticmethod
+    @traced
+    async def for_guild(guild_id: int) -> Dict[int, Optional[bool]]:
+        rows = (
+            await db.select([LockedChannel.channel_id, LockedChannel.send_messages])
+            .where(LockedChannel.guild_id == guild_id)
+            .gino.all()
+        )
+
+        return {channel_id: send_messages for channel_id, send_messages in rows}
+
+    @staticmethod
+    @traced
+    async def release(guild_id: int, channel_ids: Collection[int]) -> None:
+        if not channel_ids:
+            return
+
+        await LockedChannel.delete.where(LockedChannel.guild_id == guild_id).where(
+            LockedChannel.channel_id.in_(list(channel_ids))
+        ).gino.status()
@@ -3,11 +3,17 @@ from __future__ import annotations
 import discord
 import pendulum
 
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from botus_receptus.gino import Snowflake
 
 from .base import db, Base
 from ..db import DateTime
+from .instrumentation import traced
+
+
+def _updated(status: str) -> int:
+    # e.g. 'UPDATE 3'
+    return int(status.split()[-1])
 
 
 class Warning(Base):
@@ -26,8 +32,9 @@ class Warning(Base):
     _idx2 = db.Index('warnings_guild_member_idx', 'guild_id', 'member_id')
 
     @staticmethod
+    @traced
     async def get_guild_counts(guild: discord.Guild) -> List[Tuple[int, int, int]]:
-        return await db.all(
+        return await db.reader.all(
             db.select(
                 [
                     Warning.member_id,
@@ -45,22 +52,36 @@ class Warning(Base):
         )
 
     @staticmethod
+    @traced
+    async def get_active_counts(guild_id: int) -> Dict[int, int]:
+        # from the primary, since the counts are kept up to date from here on
+        rows = (
+            await db.select([Warning.member_id, db.func.count(Warning.id)])
+            .where(Warning.guild_id == guild_id)
+            .where(Warning.cleared_on.is_(None))
+            .group_by(Warning.member_id)
+            .gino.all()
+        )
+
+        return {member_id: count for member_id, count in rows}
+
+    @staticmethod
+    @traced
     async def get_for_member(
         guild: discord.Guild, member: discord.Member
     ) -> List[Warning]:
-        return (
-            await Warning.query.where(
+        return await db.reader.all(
+            Warning.query.where(
                 db.and_(Warning.guild_id == guild.id, Warning.member_id == member.id)
-            )
-            .order_by(Warning.timestamp)
-            .gino.all()
+            ).order_by(Warning.timestamp)
         )
 
     @staticmethod
+    @traced
     async def clear_all(
         guild: discord.Guild, member: discord.Member, cleared_by: int
-    ) -> None:
-        await Warning.update.values(
+    ) -> int:
+        query = Warning.update.values(
             cleared_on=pendulum.now(), cleared_by=cleared_by
         ).where(
             db.and_(
@@ -68,13 +89,17 @@ class Warning(Base):
                 Warning.member_id == member.id,
                 Warning.cleared_on.is_(None),
             )
-        ).gino.status()
+        )
+        status, _ = await query.gino.status()
+
+        return _updated(status)
 
     @staticmethod
+    @traced
     async def clear_one(
         guild: discord.Guild, member: discord.Member, id: int, cleared_by: int
-    ) -> None:
-        await Warning.update.values(
+    ) -> int:
+        query = Warning.update.values(
             cleared_on=pendulum.now(), cleared_by=cleared_by
         ).where(
             db.and_(
@@ -83,4 +108,7 @@ class Warning(Base):
                 Warning.id == id,
                 Warning.cleared_on.is_(None),
             )
-        ).gino.status()
+        )
+        status, _ = await query.gino.status()
+
+        return _updated(status)
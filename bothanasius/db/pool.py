@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from typing import Any, ClassVar, Dict, List, Optional
+from typing_extensions import Final
+
+import asyncio
+import logging
+import time
+
+from gino.dialects.asyncpg import Pool
+
+from ..metrics import Counter, Distribution, Gauge, LabelValues
+
+log = logging.getLogger(__name__)
+
+pool_connections: Final = Gauge(
+    'bothanasius_db_pool_connections',
+    'Open pool connections by state',
+    ('pool', 'state'),
+)
+pool_waiters: Final = Gauge(
+    'bothanasius_db_pool_waiters', 'Tasks waiting to acquire a connection', ('pool',)
+)
+pool_acquire_latency: Final = Distribution(
+    'bothanasius_db_pool_acquire_duration_seconds',
+    'Time spent waiting for a pool connection',
+    ('pool',),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+pool_acquire_timeouts: Final = Counter(
+    'bothanasius_db_pool_acquire_timeouts_total',
+    'Connection acquires that timed out',
+    ('pool',),
+)
+
+
+class InstrumentedPool(Pool):
+    """
+    gino's asyncpg pool with a default acquire timeout, wait time metrics and a
+    warning when waits get long
+    """
+
+    # set from [bot.db.pool] before any engine is created
+    acquire_timeout: ClassVar[Optional[float]] = None
+    slow_acquire_threshold: ClassVar[Optional[float]] = 0.1
+
+    pools: ClassVar[List[InstrumentedPool]] = []
+
+    name: str
+    max_size: int
+    in_use: int
+    waiters: int
+
+    def __init__(self, url: Any, loop: Any, **kwargs: Any) -> None:
+        super().__init__(url, loop, **kwargs)
+
+        self.name = f'{url.host}/{url.database}'
+        self.max_size = kwargs.get('max_size', 10)
+        self.in_use = 0
+        self.waiters = 0
+
+        InstrumentedPool.pools.append(self)
+
+    @property
+    def size(self) -> int:
+        # asyncpg 0.18 has no public way to count open connections
+        holders = getattr(self.raw_pool, '_holders', [])
+        return sum(1 for holder in holders if getattr(holder, '_con', None) is not None)
+
+    async def acquire(self, *, timeout: Optional[float] = None) -> Any:
+        if timeout is None:
+            timeout = self.acquire_timeout
+
+        self.waiters += 1
+        start = time.perf_counter()
+
+        try:
+            connection = await super().acquire(timeout=timeout)
+        except asyncio.TimeoutError:
+            pool_acquire_timeouts.inc(pool=self.name)
+            log.warning(
+                'Timed out acquiring a connection from %s after %.3fs '
+                '(%d in use, %d waiting)',
+                self.name,
+                time.perf_counter() - start,
+                self.in_use,
+                self.waiters - 1,
+            )
+            raise
+        finally:
+            self.waiters -= 1
+
+        elapsed = time.perf_counter() - start
+        pool_acquire_latency.observe(elapsed, pool=self.name)
+        self.in_use += 1
+
+        threshold = self.slow_acquire_threshold
+        if threshold is not None and elapsed >= threshold:
+            log.warning(
+                'Waited %.3fs to acquire a connection from %s '
+                '(%d in use of %d, %d waiting)',
+                elapsed,
+                self.name,
+                self.in_use,
+                self.max_size,
+                self.waiters,
+            )
+
+        return connection
+
+    async def release(self, conn: Any) -> None:
+        self.in_use -= 1
+        await super().release(conn)
+
+    async def close(self) -> None:
+        if self in InstrumentedPool.pools:
+            InstrumentedPool.pools.remove(self)
+
+        await super().close()
+
+
+def _connections() -> Dict[LabelValues, float]:
+    values: Dict[LabelValues, float] = {}
+
+    for pool in InstrumentedPool.pools:
+        values[(pool.name, 'in_use')] = pool.in_use
+        values[(pool.name, 'idle')] = max(pool.size - pool.in_use, 0)
+
+    return values
+
+
+def _waiters() -> Dict[LabelValues, float]:
+    return {(pool.name,): pool.waiters for pool in InstrumentedPool.pools}
+
+
+pool_connections.set_function(_connections)
+pool_waiters.set_function(_waiters)
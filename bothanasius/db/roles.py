@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import discord
-from typing import AsyncIterator
+from typing import AsyncIterator, FrozenSet
 from botus_receptus.gino import Snowflake
 
 from .base import db, Base
+from .instrumentation import traced
+from .invalidation import bus
 
 
 class SelfRole(Base):
@@ -20,15 +22,36 @@ class SelfRole(Base):
     )
 
     @staticmethod
+    @traced
+    async def add(guild: discord.Guild, role: discord.Role) -> None:
+        await SelfRole.create(guild_id=guild.id, role_id=role.id)
+        bus.publish(SelfRole.__tablename__, guild.id)
+
+    @staticmethod
+    @traced
     async def delete_one(guild: discord.Guild, role: discord.Role) -> None:
         await SelfRole.delete.where(SelfRole.guild_id == guild.id).where(
             SelfRole.role_id == role.id
         ).gino.status()
+        bus.publish(SelfRole.__tablename__, guild.id)
+
+    @staticmethod
+    @traced
+    async def get_role_ids(guild_id: int) -> FrozenSet[int]:
+        rows = (
+            await db.select([SelfRole.role_id])
+            .where(SelfRole.guild_id == guild_id)
+            .gino.all()
+        )
+
+        return frozenset(row[0] for row in rows)
 
     @staticmethod
+    @traced
     async def get_for_guild(guild: discord.Guild) -> AsyncIterator[SelfRole]:
-        async with db.transaction():
-            async for role in SelfRole.query.where(
-                SelfRole.guild_id == guild.id
-            ).gino.iterate():
-                yield role
+        async with db.reader.acquire() as conn:
+            async with conn.transaction():
+                async for role in conn.iterate(
+                    SelfRole.query.where(SelfRole.guild_id == guild.id)
+                ):
+                    yield role
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+from typing_extensions import Final
+
+import asyncio
+import attr
+
+from .db.mod import Warning
+
+ESCALATION_ACTIONS: Final = ('mute', 'timeout', 'ban')
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class EscalationStep(object):
+    warnings: int
+    action: str
+    # None for a punishment without an end
+    minutes: Optional[int]
+
+    def describe(self) -> str:
+        duration = f' for {self.minutes} minutes' if self.minutes is not None else ''
+        return f'{self.warnings} warnings: {self.action}{duration}'
+
+
+def policy_steps(policy: Optional[Dict[str, Any]]) -> List[EscalationStep]:
+    """
+    The steps of a guild's warning policy, stored as
+    `{"<warnings>": {"action": ..., "minutes": ...}}`, fewest warnings first
+    """
+    if not policy:
+        return []
+
+    return sorted(
+        (
+            EscalationStep(int(warnings), step['action'], step.get('minutes'))
+            for warnings, step in policy.items()
+        ),
+        key=lambda step: step.warnings,
+    )
+
+
+def crossed(
+    steps: List[EscalationStep], before: int, after: int
+) -> Optional[EscalationStep]:
+    """
+    The harshest step reached by going from `before` to `after` active warnings
+    """
+    reached = [step for step in steps if before < step.warnings <= after]
+
+    return reached[-1] if reached else None
+
+
+class WarningCounts(object):
+    """
+    Active warnings per member, loaded once per guild and then kept up to date
+    as warnings are given and cleared
+    """
+
+    _guilds: Dict[int, Dict[int, int]]
+    _lock: asyncio.Lock
+
+    def __init__(self, *, loop: asyncio.AbstractEventLoop) -> None:
+        self._guilds = {}
+        self._lock = asyncio.Lock(loop=loop)
+
+    async def load(self, guild_id: int) -> None:
+        """
+        Must be awaited before a warning is added or cleared, so that the change
+        isn't counted twice
+        """
+        if guild_id in self._guilds:
+            return
+
+        async with self._lock:
+            if guild_id not in self._guilds:
+                self._guilds[guild_id] = await Warning.get_active_counts(guild_id)
+
+    def adjust(self, guild_id: int, member_id: int, delta: int) -> Tuple[int, int]:
+        """
+        Returns the member's active warnings before and after the change
+        """
+        counts = self._guilds[guild_id]
+        before = counts.get(member_id, 0)
+        after = max(before + delta, 0)
+
+        if after:
+            counts[member_id] = after
+        else:
+            counts.pop(member_id, None)
+
+        return before, after
+
+    def forget(self, guild_id: Optional[int] = None) -> None:
+        if guild_id is None:
+            self._guilds.clear()
+        else:
+            self._guilds.pop(guild_id, None)
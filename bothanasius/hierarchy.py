@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional, Tuple
+from typing_extensions import Final
+
+import discord
+
+from discord.ext import commands
+
+from .metrics import Counter
+
+role_edits_skipped: Final = Counter(
+    'bothanasius_role_edits_skipped_total',
+    'Role changes not sent because the bot cannot manage the role',
+)
+
+
+class CannotManageRole(commands.CommandError):
+    role: discord.Role
+
+    def __init__(self, role: discord.Role) -> None:
+        self.role = role
+        super().__init__(message=f'Cannot manage the role \'{role.name}\'')
+
+
+class RoleHierarchy(object):
+    """
+    Where the bot stands in each guild's role hierarchy, so that role changes it
+    cannot make are refused before sending a request that would be forbidden.
+    Guilds are dropped whenever their roles or the bot's member change.
+    """
+
+    # guild ID -> (position of the bot's top role, has manage roles)
+    _standing: Dict[int, Tuple[int, bool]]
+
+    def __init__(self) -> None:
+        self._standing = {}
+
+    def __len__(self) -> int:
+        return len(self._standing)
+
+    def __get_standing(self, guild: discord.Guild) -> Optional[Tuple[int, bool]]:
+        try:
+            return self._standing[guild.id]
+        except KeyError:
+            pass
+
+        me = guild.me
+
+        if me is None:
+            return None
+
+        standing = (me.top_role.position, me.guild_permissions.manage_roles)
+        self._standing[guild.id] = standing
+
+        return standing
+
+    def can_manage(self, role: discord.Role) -> bool:
+        if role.managed or role.is_default():
+            return False
+
+        standing = self.__get_standing(role.guild)
+
+        # let Discord decide when the bot's member isn't known yet
+        if standing is None:
+            return True
+
+        top_position, manage_roles = standing
+
+        return manage_roles and role.position < top_position
+
+    def check(self, roles: Iterable[discord.Role]) -> None:
+        """
+        Raises `CannotManageRole` for the first role in `roles` that the bot
+        cannot add or remove
+        """
+        for role in roles:
+            if not self.can_manage(role):
+                role_edits_skipped.inc()
+                raise CannotManageRole(role)
+
+    def invalidate(self, guild_id: Optional[int] = None) -> None:
+        if guild_id is None:
+            self._standing.clear()
+        else:
+            self._standing.pop(guild_id, None)
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional, Tuple
+from typing_extensions import Final
+
+import attr
+import copy
+import logging
+import queue
+import random
+import threading
+
+from .metrics import Counter
+from .ratelimit import TokenBucket
+
+_exception_formatter: Final = logging.Formatter()
+
+log_records_dropped: Final = Counter(
+    'bothanasius_log_records_dropped_total',
+    'Log records dropped by sampling or rate limiting',
+    ('logger',),
+)
+
+
+@attr.s(auto_attribs=True, slots=True)
+class SamplingRule(object):
+    # fraction of records to keep
+    sample: float = 1.0
+    # records per second (with bursts up to `burst`), 0 for unlimited
+    rate: float = 0.0
+    burst: float = 0.0
+    # records above this level are never dropped
+    level: int = logging.DEBUG
+    bucket: Optional[TokenBucket] = None
+    # records are filtered on whichever thread logs them
+    lock: threading.Lock = attr.ib(factory=threading.Lock)
+
+    def __attrs_post_init__(self) -> None:
+        if self.rate > 0:
+            self.bucket = TokenBucket(self.rate, self.burst or self.rate)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> SamplingRule:
+        level = config.get('level', logging.DEBUG)
+
+        return cls(
+            sample=config.get('sample', 1.0),
+            rate=config.get('rate', 0.0),
+            burst=config.get('burst', 0.0),
+            level=logging.getLevelName(level.upper())
+            if isinstance(level, str)
+            else level,
+        )
+
+    def allow(self) -> bool:
+        if self.sample < 1.0 and random.random() >= self.sample:
+            return False
+
+        if self.bucket is None:
+            return True
+
+        with self.lock:
+            return self.bucket.consume()
+
+
+class SamplingFilter(logging.Filter):
+    rules: Dict[str, SamplingRule]
+
+    _lookup: Dict[str, Optional[SamplingRule]]
+
+    def __init__(self, rules: Dict[str, SamplingRule]) -> None:
+        super().__init__()
+
+        self.rules = rules
+        self._lookup = {}
+
+    def _rule_for(self, name: str) -> Optional[SamplingRule]:
+        try:
+            return self._lookup[name]
+        except KeyError:
+            pass
+
+        # the most specific configured ancestor wins
+        rule: Optional[SamplingRule] = None
+        current = name
+
+        while True:
+            if current in self.rules:
+                rule = self.rules[current]
+                break
+
+            if '.' not in current:
+                rule = self.rules.get('root')
+                break
+
+            current = current.rsplit('.', 1)[0]
+
+        self._lookup[name] = rule
+        return rule
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rule = self._rule_for(record.name)
+
+        if rule is None or record.levelno > rule.level or rule.allow():
+            return True
+
+        log_records_dropped.inc(logger=record.name)
+        return False
+
+
+class DeferredQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # QueueHandler formats the whole record on the calling thread; leave that to
+        # the listener, but merge the arguments now, since they may change before
+        # the listener gets to them, and don't keep traceback frames alive while the
+        # record waits in the queue
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+
+def _loggers_with_handlers() -> List[logging.Logger]:
+    loggers = [logging.getLogger()]
+
+    for logger in logging.Logger.manager.loggerDict.values():
+        if isinstance(logger, logging.Logger) and logger.handlers:
+            loggers.append(logger)
+
+    return loggers
+
+
+class QueueLogging(object):
+    """
+    Moves every configured handler behind a queue serviced by a background thread
+    """
+
+    filter: SamplingFilter
+
+    _listeners: List[QueueListener]
+    _moved: List[Tuple[logging.Logger, List[logging.Handler]]]
+
+    def __init__(self, sampling: Dict[str, Dict[str, Any]]) -> None:
+        self.filter = SamplingFilter(
+            {
+                name: SamplingRule.from_config(config)
+                for name, config in sampling.items()
+            }
+        )
+        self._listeners = []
+        self._moved = []
+
+    def start(self) -> None:
+        if self._moved:
+            return
+
+        for logger in _loggers_with_handlers():
+            handlers = [
+                handler
+                for handler in logger.handlers
+                if not isinstance(handler, QueueHandler)
+            ]
+
+            if not handlers:
+                continue
+
+            record_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+            queue_handler = DeferredQueueHandler(record_queue)
+            queue_handler.addFilter(self.filter)
+
+            for handler in handlers:
+                logger.removeHandler(handler)
+
+            logger.addHandler(queue_handler)
+
+            listener = QueueListener(
+                record_queue, *handlers, respect_handler_level=True
+            )
+            listener.start()
+
+            self._listeners.append(listener)
+            self._moved.append((logger, handlers))
+
+    def stop(self) -> None:
+        for listener in self._listeners:
+            listener.stop()
+
+        for logger, handlers in self._moved:
+            for handler in list(logger.handlers):
+                if isinstance(handler, DeferredQueueHandler):
+                    logger.removeHandler(handler)
+
+            for handler in handlers:
+                logger.addHandler(handler)
+
+        self._listeners.clear()
+        self._moved.clear()
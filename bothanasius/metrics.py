@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from typing_extensions import Final
+
+import discord
+import logging
+import time
+
+from aiohttp import web
+
+if TYPE_CHECKING:
+    from discord.http import HTTPClient, Route
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS: Final = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+LATENESS_BUCKETS: Final = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class Histogram(object):
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    buckets: Tuple[float, ...]
+    counts: List[int]
+    count: int
+    sum: float
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        # the last slot holds everything above the largest bucket (+Inf)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the q-th quantile as the upper bound of the bucket it falls in
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+
+        for index, count in enumerate(self.counts):
+            seen += count
+
+            if seen >= rank and count > 0:
+                return (
+                    self.buckets[index] if index < len(self.buckets) else float('inf')
+                )
+
+        return float('inf')
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        result: List[Tuple[float, int]] = []
+        total = 0
+
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+
+        return result
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+
+    pairs = ','.join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+    return f'{{{pairs}}}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+
+    if float(value).is_integer():
+        return str(int(value))
+
+    return repr(float(value))
+
+
+class Metric(object):
+    type: str = 'untyped'
+
+    name: str
+    help: str
+    label_names: Tuple[str, ...]
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+
+        registry.register(self)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} {self.type}'
+
+        for name, labels, value in self.samples():
+            yield f'{name}{labels} {_format_value(value)}'
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    values: Dict[LabelValues, float]
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()) -> None:
+        self.values = {}
+
+        super().__init__(name, help, label_names)
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        for key, value in self.values.items():
+            yield self.name, _format_labels(self.label_names, key), value
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    values: Dict[LabelValues, float]
+    function: Optional[Callable[[], Dict[LabelValues, float]]]
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()) -> None:
+        self.values = {}
+        self.function = None
+
+        super().__init__(name, help, label_names)
+
+    def set(self, value: float, **labels: Any) -> None:
+        self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], Dict[LabelValues, float]]) -> None:
+        """
+        Compute the values when scraped instead of storing them
+        """
+        self.function = function
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        values = self.function() if self.function is not None else self.values
+
+        for key, value in values.items():
+            yield self.name, _format_labels(self.label_names, key), value
+
+
+class Distribution(Metric):
+    type = 'histogram'
+
+    buckets: Tuple[float, ...]
+    histograms: Dict[LabelValues, Histogram]
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.buckets = tuple(buckets)
+        self.histograms = {}
+
+        super().__init__(name, help, label_names)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        histogram = self.histograms.get(key)
+
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.buckets)
+
+        histogram.observe(value)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        bucket_names = self.label_names + ('le',)
+
+        for key, histogram in self.histograms.items():
+            for bound, count in histogram.cumulative():
+                yield (
+                    f'{self.name}_bucket',
+                    _format_labels(bucket_names, key + (_format_value(bound),)),
+                    count,
+                )
+
+            labels = _format_labels(self.label_names, key)
+            yield f'{self.name}_sum', labels, histogram.sum
+            yield f'{self.name}_count', labels, histogram.count
+
+
+class Registry(object):
+    metrics: Dict[str, Metric]
+
+    def __init__(self) -> None:
+        self.metrics = {}
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+
+        self.metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+
+        return '\n'.join(lines) + '\n'
+
+
+registry: Final = Registry()
+
+message_latency: Final = Distribution(
+    'bothanasius_message_duration_seconds',
+    'Time spent in process_commands per guild message',
+)
+command_latency: Final = Distribution(
+    'bothanasius_command_duration_seconds',
+    'Command invocation latency',
+    ('command', 'outcome'),
+)
+check_failures: Final = Counter(
+    'bothanasius_check_failures_total', 'Commands rejected by checks', ('command',)
+)
+event_latency: Final = Distribution(
+    'bothanasius_event_duration_seconds',
+    'Event handler latency',
+    ('event', 'handler'),
+)
+event_errors: Final = Counter(
+    'bothanasius_event_errors_total',
+    'Event handlers that raised',
+    ('event', 'handler'),
+)
+rest_latency: Final = Distribution(
+    'bothanasius_rest_duration_seconds',
+    'Discord REST request latency, including rate limit waits',
+    ('method', 'route', 'status'),
+)
+action_lateness: Final = Distribution(
+    'bothanasius_action_lateness_seconds',
+    'Time between a delayed action expiring and it being fired',
+    ('event',),
+    buckets=LATENESS_BUCKETS,
+)
+db_query_latency: Final = Distribution(
+    'bothanasius_db_query_duration_seconds',
+    'Database statement latency by issuing model method',
+    ('source',),
+)
+db_query_rows: Final = Counter(
+    'bothanasius_db_query_rows_total',
+    'Rows returned by database statements by issuing model method',
+    ('source',),
+)
+
+
+def instrument_http(http: HTTPClient) -> None:
+    request = http.request
+
+    async def timed_request(route: Route, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        status = 'error'
+
+        try:
+            result = await request(route, **kwargs)
+            status = 'ok'
+            return result
+        except discord.HTTPException as e:
+            status = str(e.status)
+            raise
+        finally:
+            rest_latency.observe(
+                time.perf_counter() - start,
+                method=route.method,
+                route=route.path,
+                status=status,
+            )
+
+    setattr(http, 'request', timed_request)
+
+
+class MetricsServer(object):
+    host: str
+    port: int
+
+    _runner: Optional[web.AppRunner]
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=registry.render(), content_type='text/plain', charset='utf-8'
+        )
+
+    async def start(self) -> None:
+        if self._runner is not None:
+            return
+
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+        log.info('Serving metrics on http://%s:%s/metrics', self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
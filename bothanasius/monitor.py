@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from functools import partial
+from types import FrameType
+from typing import Any, Dict, Optional
+from typing_extensions import Final
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from .metrics import Counter, Distribution, Gauge
+
+log = logging.getLogger(__name__)
+
+PACKAGE_DIR: Final = os.path.dirname(os.path.abspath(__file__))
+
+LAG_BUCKETS: Final = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+loop_lag: Final = Distribution(
+    'bothanasius_loop_lag_seconds',
+    'How late the event loop woke up a sleeping task',
+    buckets=LAG_BUCKETS,
+)
+loop_lag_last: Final = Gauge(
+    'bothanasius_loop_lag_last_seconds', 'Most recently measured event loop lag'
+)
+loop_blocked: Final = Counter(
+    'bothanasius_loop_blocked_total',
+    'Times the event loop was blocked for longer than the threshold',
+    ('location',),
+)
+
+
+def sample_frame(thread_id: int) -> Optional[FrameType]:
+    return sys._current_frames().get(thread_id)
+
+
+def blame(frame: FrameType) -> str:
+    """
+    The innermost frame that belongs to this package, or the innermost frame if
+    none of them do
+    """
+    innermost = frame
+    current: Optional[FrameType] = frame
+
+    while current is not None:
+        if current.f_code.co_filename.startswith(PACKAGE_DIR):
+            innermost = current
+            break
+        current = current.f_back
+
+    code = innermost.f_code
+    return f'{os.path.basename(code.co_filename)}:{innermost.f_lineno} ({code.co_name})'
+
+
+class LoopMonitor(object):
+    loop: asyncio.AbstractEventLoop
+    interval: float
+    threshold: float
+
+    _heartbeat: float
+    _reported: float
+    _thread_id: Optional[int]
+    _task: Optional['asyncio.Task[None]']
+    _watchdog: Optional[threading.Thread]
+    _stopped: threading.Event
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        *,
+        interval: float = 0.5,
+        threshold: float = 0.25,
+    ) -> None:
+        self.loop = loop
+        self.interval = interval
+        self.threshold = threshold
+        self._heartbeat = time.monotonic()
+        self._reported = 0.0
+        self._thread_id = None
+        self._task = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+
+    @classmethod
+    def from_config(
+        cls, loop: asyncio.AbstractEventLoop, config: Dict[str, Any]
+    ) -> Optional[LoopMonitor]:
+        if not config.get('enabled', True):
+            return None
+
+        return cls(
+            loop,
+            interval=config.get('interval', 0.5),
+            threshold=config.get('block_threshold', 0.25),
+        )
+
+    def start(self) -> None:
+        """
+        Must be called from the thread running the event loop
+        """
+        if self._task is not None:
+            return
+
+        self._thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = self.loop.create_task(self.__measure())
+        self._watchdog = threading.Thread(
+            target=self.__watch, name='bothanasius-loop-watchdog', daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def __measure(self) -> None:
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._heartbeat = now = time.monotonic()
+
+            lag = max(now - before - self.interval, 0)
+            loop_lag.observe(lag)
+            loop_lag_last.set(lag)
+
+    def __watch(self) -> None:
+        assert self._thread_id is not None
+
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+
+            # only report each stall once
+            if blocked < self.threshold or heartbeat == self._reported:
+                continue
+
+            frame = sample_frame(self._thread_id)
+            if frame is None:
+                continue
+
+            self._reported = heartbeat
+            location = blame(frame)
+            # metrics are only touched on the loop, where they are rendered
+            self.loop.call_soon_threadsafe(partial(loop_blocked.inc, location=location))
+            log.warning(
+                'Event loop blocked for at least %.3fs in %s:\n%s',
+                blocked,
+                location,
+                ''.join(traceback.format_stack(frame)),
+            )
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
+from typing_extensions import Final
+
+import asyncio
+import attr
+import discord
+import hashlib
+import logging
+
+from .metrics import Counter
+from .ratelimit import TokenBucket
+
+if TYPE_CHECKING:
+    from .db.admin import GuildPrefs
+
+log = logging.getLogger(__name__)
+
+# bump whenever the rules change so that every guild is synced again
+SYNC_VERSION: Final = 1
+
+# permissions each role must deny, by channel type
+DenyRules = Mapping[Type[discord.abc.GuildChannel], Tuple[str, ...]]
+
+MUTE_DENY: Final[DenyRules] = {
+    discord.TextChannel: ('send_messages', 'add_reactions'),
+    discord.VoiceChannel: ('speak',),
+    discord.CategoryChannel: ('send_messages', 'add_reactions', 'speak'),
+}
+TIME_OUT_DENY: Final[DenyRules] = {
+    discord.TextChannel: ('read_messages',),
+    discord.VoiceChannel: ('read_messages',),
+    discord.CategoryChannel: ('read_messages',),
+}
+
+RoleRules = Sequence[Tuple[discord.Role, DenyRules]]
+
+overwrite_changes: Final = Counter(
+    'bothanasius_overwrite_changes_total',
+    'Channel permission overwrite edits',
+    ('result',),
+)
+overwrite_syncs: Final = Counter(
+    'bothanasius_overwrite_syncs_total',
+    'Guild overwrite syncs by outcome',
+    ('result',),
+)
+
+
+@attr.s(auto_attribs=True, slots=True)
+class OverwriteChange(object):
+    channel: discord.abc.GuildChannel
+    target: Union[discord.Role, discord.Member]
+    # None removes the overwrite
+    overwrite: Optional[discord.PermissionOverwrite]
+
+
+def rules_for(prefs: GuildPrefs) -> RoleRules:
+    rules: List[Tuple[discord.Role, DenyRules]] = []
+
+    mute_role = prefs.guild_mute_role
+    if mute_role is not None:
+        rules.append((mute_role, MUTE_DENY))
+
+    time_out_role = prefs.guild_time_out_role
+    if time_out_role is not None:
+        rules.append((time_out_role, TIME_OUT_DENY))
+
+    return rules
+
+
+def diff_channel(
+    channel: discord.abc.GuildChannel, rules: RoleRules
+) -> List[OverwriteChange]:
+    """
+    The overwrite edits needed for `channel` to deny what `rules` require. Any
+    other permissions in the overwrites are left as they are.
+    """
+    changes: List[OverwriteChange] = []
+
+    for role, deny in rules:
+        names = deny.get(type(channel), ())
+        current = channel.overwrites_for(role)
+
+        if all(getattr(current, name) is False for name in names):
+            continue
+
+        overwrite = discord.PermissionOverwrite(**dict(iter(current)))
+        overwrite.update(**{name: False for name in names})
+        changes.append(OverwriteChange(channel, role, overwrite))
+
+    return changes
+
+
+def fingerprint(
+    guild: discord.Guild,
+    rules: RoleRules,
+    pending: Iterable[OverwriteChange] = (),
+) -> str:
+    """
+    Hashes the overwrites of the roles in `rules` across every channel, as they
+    will be once `pending` has been applied
+    """
+    overrides = {
+        (change.channel.id, change.target.id): change.overwrite for change in pending
+    }
+    digest = hashlib.sha1(f'{SYNC_VERSION}'.encode('ascii'))
+
+    for role, _ in rules:
+        digest.update(f';{role.id}'.encode('ascii'))
+
+    for channel in sorted(guild.channels, key=lambda channel: channel.id):
+        digest.update(f'|{channel.id}'.encode('ascii'))
+
+        for role, _ in rules:
+            key = (channel.id, role.id)
+            overwrite = (
+                overrides[key] if key in overrides else channel.overwrites_for(role)
+            )
+            values = ''.join(
+                '-' if value is None else str(int(value))
+                for _, value in iter(overwrite or discord.PermissionOverwrite())
+            )
+            digest.update(f':{values}'.encode('ascii'))
+
+    return digest.hexdigest()
+
+
+class OverwriteSync(object):
+    """
+    Applies channel overwrite edits concurrently, under a rate limit shared by
+    every guild
+    """
+
+    bucket: TokenBucket
+    _semaphore: asyncio.Semaphore
+    _syncing: Set[int]
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        *,
+        rate: float = 5.0,
+        burst: float = 10.0,
+        concurrency: int = 4,
+    ) -> None:
+        self.bucket = TokenBucket(rate, burst)
+        self._semaphore = asyncio.Semaphore(concurrency, loop=loop)
+        self._syncing = set()
+
+    @classmethod
+    def from_config(
+        cls, loop: asyncio.AbstractEventLoop, config: Dict[str, Any]
+    ) -> Optional[OverwriteSync]:
+        if not config.get('enabled', False):
+            return None
+
+        return cls(
+            loop,
+            rate=config.get('rate', 5.0),
+            burst=config.get('burst', 10.0),
+            concurrency=int(config.get('concurrency', 4)),
+        )
+
+    def is_syncing(self, guild_id: int) -> bool:
+        return guild_id in self._syncing
+
+    async def sync_guild(
+        self, guild: discord.Guild, rules: RoleRules, previous: Optional[str]
+    ) -> Optional[str]:
+        """
+        Brings every channel in `guild` in line with `rules`, unless nothing has
+        changed since the sync that produced the `previous` fingerprint. Returns
+        the fingerprint to store, or None if the guild could not be fully synced.
+        """
+        if not rules or guild.id in self._syncing:
+            return None
+
+        current = fingerprint(guild, rules)
+
+        if current == previous:
+            overwrite_syncs.inc(result='unchanged')
+            return current
+
+        self._syncing.add(guild.id)
+
+        try:
+            changes = [
+                change
+                for channel in guild.channels
+                for change in diff_channel(channel, rules)
+            ]
+
+            failed = await self.apply(changes, reason='Bothanasius synced overwrites')
+
+            if failed:
+                overwrite_syncs.inc(result='failed')
+                return None
+        finally:
+            self._syncing.discard(guild.id)
+
+        overwrite_syncs.inc(result='synced')
+        log.info('Synced %d overwrites in guild %s', len(changes), guild.id)
+
+        return fingerprint(guild, rules, changes)
+
+    async def sync_channel(
+        self, channel: discord.abc.GuildChannel, rules: RoleRules
+    ) -> bool:
+        failed = await self.apply(
+            diff_channel(channel, rules), reason='Bothanasius synced overwrites'
+        )
+
+        return not failed
+
+    async def apply(
+        self, changes: Sequence[OverwriteChange], *, reason: str
+    ) -> List[OverwriteChange]:
+        """
+        Applies `changes`, returning the ones that failed
+        """
+        if not changes:
+            return []
+
+        results = await asyncio.gather(
+            *(self.__apply_one(change, reason) for change in changes)
+        )
+
+        return [change for change, applied in zip(changes, results) if not applied]
+
+    async def __apply_one(self, change: OverwriteChange, reason: str) -> bool:
+        channel = change.channel
+        me = channel.guild.me
+
+        if me is None or not channel.permissions_for(me).manage_roles:
+            overwrite_changes.inc(result='skipped')
+            return False
+
+        async with self._semaphore:
+            while not self.bucket.consume():
+                await asyncio.sleep(self.bucket.delay())
+
+            try:
+                await channel.set_permissions(
+                    change.target, overwrite=change.overwrite, reason=reason
+                )
+            except discord.HTTPException as e:
+                overwrite_changes.inc(result='failed')
+                log.warning(
+                    'Could not edit overwrites of %s in channel %s: %s',
+                    change.target.id,
+                    channel.id,
+                    e,
+                )
+                return False
+
+        overwrite_changes.inc(result='applied')
+        return True
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from collections import Counter
+from types import FrameType
+from typing import Dict, List, Optional, Tuple
+
+import asyncio
+import attr
+import linecache
+import os
+import threading
+import time
+import tracemalloc
+
+from .monitor import sample_frame
+
+Stack = Tuple[str, ...]
+
+
+def _label(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+def _stack(frame: Optional[FrameType]) -> Stack:
+    labels: List[str] = []
+
+    while frame is not None:
+        labels.append(_label(frame))
+        frame = frame.f_back
+
+    labels.reverse()
+    return tuple(labels)
+
+
+@attr.s(auto_attribs=True, slots=True)
+class FunctionStats(object):
+    name: str
+    own: int = 0
+    total: int = 0
+
+
+@attr.s(auto_attribs=True, slots=True)
+class Profile(object):
+    duration: float
+    samples: int
+    stacks: 'Counter[Stack]'
+
+    def top(self, count: int = 25) -> List[FunctionStats]:
+        functions: Dict[str, FunctionStats] = {}
+
+        for stack, hits in self.stacks.items():
+            for name in set(stack):
+                stats = functions.get(name)
+                if stats is None:
+                    stats = functions[name] = FunctionStats(name)
+                stats.total += hits
+
+            if stack:
+                functions[stack[-1]].own += hits
+
+        return sorted(
+            functions.values(), key=lambda stats: (stats.own, stats.total), reverse=True
+        )[:count]
+
+    def collapsed(self) -> str:
+        """
+        Folded stacks, as consumed by flamegraph.pl and speedscope
+        """
+        return ''.join(
+            f'{";".join(stack)} {hits}\n' for stack, hits in self.stacks.most_common()
+        )
+
+
+class SamplingProfiler(object):
+    thread_id: int
+    interval: float
+
+    def __init__(self, thread_id: int, *, interval: float = 0.005) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+
+    def _sample(self, seconds: float) -> Profile:
+        stacks: 'Counter[Stack]' = Counter()
+        samples = 0
+        start = time.monotonic()
+        deadline = start + seconds
+
+        while time.monotonic() < deadline:
+            frame = sample_frame(self.thread_id)
+
+            if frame is not None:
+                stacks[_stack(frame)] += 1
+                samples += 1
+
+            del frame
+            time.sleep(self.interval)
+
+        return Profile(time.monotonic() - start, samples, stacks)
+
+    async def run(self, seconds: float) -> Profile:
+        """
+        Sample the stack of `thread_id` from a worker thread for `seconds`
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._sample, seconds)
+
+    @classmethod
+    def for_current_thread(cls, *, interval: float = 0.005) -> SamplingProfiler:
+        return cls(threading.get_ident(), interval=interval)
+
+
+@attr.s(auto_attribs=True, slots=True)
+class AllocationSite(object):
+    location: str
+    size_diff: int
+    count_diff: int
+    size: int
+
+
+async def allocation_diff(seconds: float, *, count: int = 15) -> List[AllocationSite]:
+    """
+    Compare tracemalloc snapshots taken `seconds` apart
+    """
+    loop = asyncio.get_event_loop()
+    started = not tracemalloc.is_tracing()
+
+    if started:
+        tracemalloc.start()
+
+    try:
+        before = await loop.run_in_executor(None, tracemalloc.take_snapshot)
+        await asyncio.sleep(seconds)
+        after = await loop.run_in_executor(None, tracemalloc.take_snapshot)
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    stats = await loop.run_in_executor(None, after.compare_to, before, 'lineno')
+    sites: List[AllocationSite] = []
+
+    for stat in stats[:count]:
+        frame = stat.traceback[0]
+        line = linecache.getline(frame.filename, frame.lineno).strip()
+        sites.append(
+            AllocationSite(
+                f'{os.path.basename(frame.filename)}:{frame.lineno} {line}',
+                stat.size_diff,
+                stat.count_diff,
+                stat.size,
+            )
+        )
+
+    return sites
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+from typing_extensions import Final
+
+from .db.delayed_action import DelayedAction
+
+MUTE: Final = 'mute'
+TIME_OUT: Final = 'time_out'
+
+# the delayed action that lifts each punishment
+REVERSAL_EVENTS: Final = {'unmute': MUTE, 'time_in': TIME_OUT}
+
+
+class PunishmentIndex(object):
+    """
+    The mutes and time outs in force in each guild, so that members who leave
+    and rejoin can be punished again without querying for them
+    """
+
+    # guild ID -> member ID -> punishments
+    _guilds: Dict[int, Dict[int, Set[str]]]
+
+    def __init__(self) -> None:
+        self._guilds = {}
+
+    def __len__(self) -> int:
+        return sum(len(members) for members in self._guilds.values())
+
+    def add(self, guild_id: int, member_id: int, punishment: str) -> None:
+        self._guilds.setdefault(guild_id, {}).setdefault(member_id, set()).add(
+            punishment
+        )
+
+    def remove(self, guild_id: int, member_id: int, punishment: str) -> None:
+        members = self._guilds.get(guild_id)
+
+        if members is None:
+            return
+
+        punishments = members.get(member_id)
+
+        if punishments is None:
+            return
+
+        punishments.discard(punishment)
+
+        if not punishments:
+            del members[member_id]
+
+            if not members:
+                del self._guilds[guild_id]
+
+    def get(self, guild_id: int, member_id: int) -> FrozenSet[str]:
+        members = self._guilds.get(guild_id)
+
+        if members is None:
+            return frozenset()
+
+        return frozenset(members.get(member_id, ()))
+
+    def load(self, actions: Iterable[DelayedAction]) -> int:
+        """
+        Adds the punishments that pending `actions` will lift
+        """
+        count = 0
+
+        for action in actions:
+            punishment = REVERSAL_EVENTS.get(action.event)
+
+            if punishment is not None:
+                guild_id, member_id = action.args[:2]
+                self.add(int(guild_id), int(member_id), punishment)
+                count += 1
+
+        return count
+
+    def forget(self, guild_id: Optional[int] = None) -> None:
+        if guild_id is None:
+            self._guilds.clear()
+        else:
+            self._guilds.pop(guild_id, None)
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import (
+    TYPE_CHECKING,
+    Awaitable,
+    Callable,
+    List,
+    NoReturn,
+    Optional,
+    Pattern,
+    Set,
+)
+from typing_extensions import Final
+
+import argparse
+import attr
+import discord
+import logging
+import re
+import shlex
+import time
+
+from botus_receptus.util import parse_duration
+
+from .bulk_delete import (
+    BULK_DELETE_MAX,
+    BULK_DELETE_MAX_AGE,
+    messages_deleted,
+    rest_calls_saved,
+)
+
+if TYPE_CHECKING:
+    from .context import Context
+
+log = logging.getLogger(__name__)
+
+# no purge looks further back than this many messages
+MAX_SCAN: Final = 5000
+# seconds between edits of the progress message
+PROGRESS_INTERVAL: Final = 2.0
+
+_snowflake: Final = re.compile(r'^<?[@#!&]*(\d{15,21})>?$')
+
+
+@attr.s(auto_attribs=True, slots=True)
+class PurgeOptions(object):
+    limit: int
+    scan: int
+    users: Set[int]
+    pattern: Optional[Pattern[str]]
+    attachments: bool
+    max_age: Optional[timedelta]
+
+    def matches(self, message: discord.Message) -> bool:
+        if message.pinned:
+            return False
+
+        if self.users and message.author.id not in self.users:
+            return False
+
+        if self.attachments and not message.attachments:
+            return False
+
+        if self.pattern is not None and self.pattern.search(message.content) is None:
+            return False
+
+        return True
+
+
+@attr.s(auto_attribs=True, slots=True)
+class PurgeProgress(object):
+    scanned: int = 0
+    deleted: int = 0
+    failed: int = 0
+    done: bool = False
+
+
+def _user_id(value: str) -> int:
+    match = _snowflake.match(value)
+
+    if match is None:
+        raise ValueError(f'\'{value}\' is not a user mention or ID')
+
+    return int(match.group(1))
+
+
+class PurgeArgumentParser(argparse.ArgumentParser):
+    def __init__(self) -> None:
+        super().__init__(add_help=False, allow_abbrev=False)
+        self.add_argument('limit', type=int, nargs='?', default=100)
+        self.add_argument('--user', dest='users', action='append', default=[])
+        self.add_argument('--match')
+        self.add_argument('--attachments', action='store_true')
+        self.add_argument('--max-age', nargs='+')
+        self.add_argument('--scan', type=int, default=1000)
+
+    def error(self, message: str) -> NoReturn:
+        raise RuntimeError(message)
+
+    @staticmethod
+    async def parse(ctx: Context, args: str) -> Optional[PurgeOptions]:
+        parser = PurgeArgumentParser()
+
+        try:
+            result = parser.parse_args(shlex.split(args))
+
+            if result.limit < 1:
+                raise ValueError('The limit must be at least 1')
+
+            max_age: Optional[timedelta] = None
+            if result.max_age is not None:
+                max_age = timedelta(
+                    seconds=parse_duration(' '.join(result.max_age)).in_seconds()
+                )
+
+            pattern: Optional[Pattern[str]] = None
+            if result.match is not None:
+                pattern = re.compile(result.match, re.IGNORECASE)
+
+            options = PurgeOptions(
+                limit=result.limit,
+                scan=min(max(result.scan, 0), MAX_SCAN),
+                users={_user_id(user) for user in result.users},
+                pattern=pattern,
+                attachments=result.attachments,
+                max_age=max_age,
+            )
+        except Exception as e:
+            await ctx.send_error(str(e))
+            return None
+
+        return options
+
+
+async def purge_history(
+    channel: discord.TextChannel,
+    options: PurgeOptions,
+    *,
+    before: discord.Message,
+    progress: Callable[[PurgeProgress], Awaitable[None]],
+) -> PurgeProgress:
+    """
+    Deletes messages matching `options` from the history before `before`,
+    fetching the history a page at a time and deleting in bulk as batches fill
+    up. `progress` is called every `PROGRESS_INTERVAL` seconds and once at the
+    end.
+    """
+    state = PurgeProgress()
+    now = datetime.utcnow()
+    bulk_cutoff = now - BULK_DELETE_MAX_AGE
+    age_cutoff = now - options.max_age if options.max_age is not None else None
+    batch: List[discord.Message] = []
+    reported = time.monotonic()
+
+    async def flush() -> None:
+        if len(batch) == 1:
+            await delete_one(batch[0])
+        elif batch:
+            try:
+                await channel.delete_messages(batch)
+            except discord.HTTPException as e:
+                log.warning('Bulk delete in %s failed: %s', channel.id, e)
+                state.failed += len(batch)
+            else:
+                messages_deleted.inc(len(batch), method='bulk')
+                rest_calls_saved.inc(len(batch) - 1)
+                state.deleted += len(batch)
+
+        batch.clear()
+
+    async def delete_one(message: discord.Message) -> None:
+        try:
+            await message.delete()
+        except discord.NotFound:
+            pass
+        except discord.HTTPException:
+            state.failed += 1
+        else:
+            messages_deleted.inc(method='single')
+            state.deleted += 1
+
+    async for message in channel.history(limit=options.scan, before=before):
+        if state.deleted + state.failed + len(batch) >= options.limit:
+            break
+
+        # history is newest first, so nothing further back can match
+        if age_cutoff is not None and message.created_at < age_cutoff:
+            break
+
+        state.scanned += 1
+
+        if options.matches(message):
+            if message.created_at > bulk_cutoff:
+                batch.append(message)
+
+                if len(batch) >= BULK_DELETE_MAX:
+                    await flush()
+            else:
+                await delete_one(message)
+
+        if time.monotonic() - reported >= PROGRESS_INTERVAL:
+            reported = time.monotonic()
+            await progress(state)
+
+    await flush()
+
+    state.done = True
+    await progress(state)
+
+    return state
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from typing_extensions import Final
+
+import discord
+import logging
+import time
+
+from .metrics import Counter
+
+log = logging.getLogger(__name__)
+
+raid_joins: Final = Counter(
+    'bothanasius_raid_joins_total',
+    'Members who joined while a raid was detected, by whether they were new',
+    ('new_account',),
+)
+
+
+class JoinRate(object):
+    """
+    Joins counted in two fixed windows, the current one and the one before it.
+    The rate over the last `window` seconds is estimated by weighting the
+    previous count by how much of it still overlaps.
+    """
+
+    __slots__ = ('started', 'current', 'previous', 'recent', 'raiding')
+
+    started: float
+    current: int
+    previous: int
+    # (time joined, member) of the latest joiners, so that the ones who came
+    # before a raid was noticed can be dealt with too
+    recent: Deque[Tuple[float, discord.Member]]
+    raiding: bool
+
+    def __init__(self, now: float, max_recent: int) -> None:
+        self.started = now
+        self.current = 0
+        self.previous = 0
+        self.recent = deque(maxlen=max_recent)
+        self.raiding = False
+
+    def add(self, now: float, window: float) -> float:
+        elapsed = now - self.started
+
+        if elapsed >= window:
+            windows = int(elapsed // window)
+            self.previous = self.current if windows == 1 else 0
+            self.current = 0
+            self.started += windows * window
+            elapsed -= windows * window
+
+        self.current += 1
+
+        return self.previous * (1 - elapsed / window) + self.current
+
+
+class RaidDetector(object):
+    """
+    Notices when more than `threshold` members join a guild within `window`
+    seconds. From then until the join rate drops again, every member whose
+    account is younger than `new_account_age` should be timed out.
+    """
+
+    threshold: int
+    window: float
+    new_account_age: timedelta
+    time_out_minutes: int
+    max_recent: int
+    # time outs applied per second
+    rate: float
+
+    _guilds: Dict[int, JoinRate]
+
+    def __init__(
+        self,
+        *,
+        threshold: int = 10,
+        window: float = 10.0,
+        new_account_age: timedelta = timedelta(days=7),
+        time_out_minutes: int = 60,
+        max_recent: int = 50,
+        rate: float = 5.0,
+    ) -> None:
+        self.threshold = threshold
+        self.window = window
+        self.new_account_age = new_account_age
+        self.time_out_minutes = time_out_minutes
+        self.max_recent = max_recent
+        self.rate = rate
+        self._guilds = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> RaidDetector:
+        return cls(
+            threshold=config.get('threshold', 10),
+            window=config.get('window', 10.0),
+            new_account_age=timedelta(days=config.get('new_account_days', 7)),
+            time_out_minutes=config.get('time_out_minutes', 60),
+            max_recent=config.get('max_recent', 50),
+            rate=config.get('rate', 5.0),
+        )
+
+    def record(self, member: discord.Member) -> List[discord.Member]:
+        """
+        Counts `member` joining and returns the members to time out because of it
+        """
+        now = time.monotonic()
+        guild_id = member.guild.id
+        rate = self._guilds.get(guild_id)
+
+        if rate is None:
+            rate = self._guilds[guild_id] = JoinRate(now, self.max_recent)
+
+        joins = rate.add(now, self.window)
+        was_raiding = rate.raiding
+        rate.raiding = joins > self.threshold
+
+        if not rate.raiding:
+            if was_raiding:
+                log.info('Raid in guild %s is over', guild_id)
+
+            rate.recent.append((now, member))
+            return []
+
+        cutoff = datetime.utcnow() - self.new_account_age
+        joined = [member]
+
+        if not was_raiding:
+            log.warning('Raid detected in guild %s: %.1f joins', guild_id, joins)
+
+            # everyone who joined within the window is part of the raid
+            joined.extend(
+                joiner
+                for joined_at, joiner in rate.recent
+                if now - joined_at <= self.window
+            )
+            rate.recent.clear()
+
+        members: List[discord.Member] = []
+
+        for joiner in joined:
+            new_account = joiner.created_at > cutoff
+            raid_joins.inc(new_account='yes' if new_account else 'no')
+
+            if new_account:
+                members.append(joiner)
+
+        return members
+
+    def forget(self, guild_id: Optional[int] = None) -> None:
+        if guild_id is None:
+            self._guilds.clear()
+        else:
+            self._guilds.pop(guild_id, None)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import time
+
+
+class TokenBucket(object):
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    rate: float
+    capacity: float
+    tokens: float
+    updated: float
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self, tokens: float = 1) -> bool:
+        self._refill(time.monotonic())
+
+        if self.tokens < tokens:
+            return False
+
+        self.tokens -= tokens
+        return True
+
+    def delay(self, tokens: float = 1) -> float:
+        """
+        Seconds until `tokens` can be consumed
+        """
+        self._refill(time.monotonic())
+
+        if self.tokens >= tokens:
+            return 0.0
+
+        return (tokens - self.tokens) / self.rate
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+from typing_extensions import Final
+
+import json
+import logging
+import os
+import struct
+import zlib
+
+log = logging.getLogger(__name__)
+
+MAGIC: Final = b'BTHS'
+# bump whenever the layout of the payload changes
+VERSION: Final = 1
+
+# magic, version, crc32 of the compressed payload
+_header: Final = struct.Struct('!4sHI')
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def dumps(data: Dict[str, Any]) -> bytes:
+    payload = zlib.compress(
+        json.dumps(data, separators=(',', ':')).encode('utf-8'), level=6
+    )
+
+    return _header.pack(MAGIC, VERSION, zlib.crc32(payload)) + payload
+
+
+def loads(raw: bytes) -> Dict[str, Any]:
+    if len(raw) < _header.size:
+        raise SnapshotError('Snapshot is truncated')
+
+    magic, version, checksum = _header.unpack_from(raw)
+    payload = raw[_header.size :]
+
+    if magic != MAGIC:
+        raise SnapshotError('Not a snapshot')
+
+    if version != VERSION:
+        raise SnapshotError(f'Snapshot version {version} is not {VERSION}')
+
+    if zlib.crc32(payload) != checksum:
+        raise SnapshotError('Snapshot checksum does not match')
+
+    data: Dict[str, Any] = json.loads(zlib.decompress(payload).decode('utf-8'))
+    return data
+
+
+def write(path: Path, data: Dict[str, Any]) -> None:
+    temp = path.with_name(f'{path.name}.tmp')
+
+    with temp.open('wb') as f:
+        f.write(dumps(data))
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(temp, path)
+
+
+def read(path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Loads and removes the snapshot at `path`. A snapshot is only good for the
+    next start, after that the running process has moved on from it.
+    """
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+    path.unlink()
+
+    try:
+        return loads(raw)
+    except (SnapshotError, ValueError, zlib.error) as e:
+        log.warning('Ignoring snapshot %s: %s', path, e)
+        return None
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import Any, ClassVar, Dict, List, Tuple
+
+import logging
+
+from discord.ext import commands
+
+log = logging.getLogger(__name__)
+
+
+class StatefulCog(object):
+    """
+    A cog that can hand its in-memory state (caches, indexes) over to the
+    instance that replaces it when its extension is reloaded. Bump
+    `state_version` whenever the shape of the exported state changes; a new
+    instance only adopts state it accepts and otherwise starts cold.
+
+    The state must not contain instances of classes defined in the cog's own
+    module, since those are replaced by the reload.
+    """
+
+    state_version: ClassVar[int] = 1
+
+    def export_state(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def import_state(self, state: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def accepts_state(self, version: int) -> bool:
+        return version == self.state_version
+
+
+def _hand_over(
+    bot: commands.Bot[Any], states: Dict[str, Tuple[int, Dict[str, Any]]]
+) -> List[str]:
+    adopted: List[str] = []
+
+    for cog_name, (version, state) in states.items():
+        cog = bot.get_cog(cog_name)
+
+        if not isinstance(cog, StatefulCog):
+            continue
+
+        if not cog.accepts_state(version):
+            log.info(
+                'Not handing over state of %s: version %s is not accepted',
+                cog_name,
+                version,
+            )
+            continue
+
+        try:
+            cog.import_state(state)
+        except Exception:
+            log.exception('Failed to hand over state of %s', cog_name)
+        else:
+            adopted.append(cog_name)
+
+    return adopted
+
+
+def reload_extension(bot: commands.Bot[Any], name: str) -> List[str]:
+    """
+    Reloads an extension, carrying over the state of its stateful cogs. Returns
+    the names of the cogs that adopted their predecessor's state.
+    """
+    states: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+    for cog_name, cog in bot.cogs.items():
+        if isinstance(cog, StatefulCog) and type(cog).__module__ == name:
+            states[cog_name] = (cog.state_version, cog.export_state())
+
+    try:
+        bot.reload_extension(name)
+    except Exception:
+        # if the new version fails to load, discord.py loads the old module
+        # again, which creates new cogs that still need the state
+        _hand_over(bot, states)
+        raise
+
+    return _hand_over(bot, states)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import asyncio
+import discord
+import logging
+import time
+
+from .cache import cache_requests
+
+log = logging.getLogger(__name__)
+
+
+class UserCache(object):
+    """
+    Display names of users by ID for users the gateway cache doesn't hold,
+    bounded to `max_size` entries that expire after `ttl` seconds
+    """
+
+    client: discord.Client
+    max_size: int
+    ttl: float
+
+    # user ID -> (expires at, display name), least recently used first
+    _entries: 'OrderedDict[int, Tuple[float, str]]'
+    # user ID -> expires at, for users that could not be fetched
+    _missing: 'OrderedDict[int, float]'
+    _fetching: 'Dict[int, asyncio.Task[Optional[str]]]'
+
+    def __init__(
+        self, client: discord.Client, *, max_size: int = 1024, ttl: float = 3600.0
+    ) -> None:
+        self.client = client
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._missing = OrderedDict()
+        self._fetching = {}
+
+    @classmethod
+    def from_config(cls, client: discord.Client, config: Dict[str, Any]) -> UserCache:
+        return cls(
+            client,
+            max_size=config.get('max_size', 1024),
+            ttl=config.get('ttl', 3600.0),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def remember(self, user: discord.abc.User) -> str:
+        name = str(user)
+        self._entries[user.id] = (time.monotonic() + self.ttl, name)
+        self._entries.move_to_end(user.id)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+        return name
+
+    def describe(self, user_id: int) -> Optional[str]:
+        """
+        Returns the display name of a user without making any requests
+        """
+        user = self.client.get_user(user_id)
+
+        if user is not None:
+            return str(user)
+
+        try:
+            expires_at, name = self._entries[user_id]
+        except KeyError:
+            cache_requests.inc(cache='users', result='miss')
+            return None
+
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            cache_requests.inc(cache='users', result='miss')
+            return None
+
+        self._entries.move_to_end(user_id)
+        cache_requests.inc(cache='users', result='hit')
+        return name
+
+    async def fetch(self, user_id: int) -> Optional[str]:
+        """
+        Like `describe`, but falls back to fetching the user. Concurrent fetches of
+        the same user share one request.
+        """
+        name = self.describe(user_id)
+
+        if name is not None:
+            return name
+
+        missing_until = self._missing.get(user_id)
+
+        if missing_until is not None:
+            if missing_until > time.monotonic():
+                return None
+
+            del self._missing[user_id]
+
+        task = self._fetching.get(user_id)
+
+        if task is None:
+            task = self.client.loop.create_task(self.__fetch(user_id))
+            self._fetching[user_id] = task
+            task.add_done_callback(lambda _: self._fetching.pop(user_id, None))
+
+        # the fetch runs on its own, so one waiter being cancelled doesn't cancel
+        # it for the others
+        return await asyncio.shield(task)
+
+    async def __fetch(self, user_id: int) -> Optional[str]:
+        try:
+            user = await self.client.fetch_user(user_id)
+        except discord.NotFound:
+            self.__remember_missing(user_id)
+            return None
+        except discord.HTTPException as e:
+            log.debug('Could not fetch user %s: %s', user_id, e)
+            return None
+
+        return self.remember(user)
+
+    async def fetch_many(self, user_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+        """
+        Fetches the display names of several users at once
+        """
+        unique = list(set(user_ids))
+        names = await asyncio.gather(*(self.fetch(user_id) for user_id in unique))
+
+        return dict(zip(unique, names))
+
+    def __remember_missing(self, user_id: int) -> None:
+        self._missing[user_id] = time.monotonic() + self.ttl
+        self._missing.move_to_end(user_id)
+
+        while len(self._missing) > self.max_size:
+            self._missing.popitem(last=False)